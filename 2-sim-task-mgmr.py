@@ -1,11 +1,21 @@
 import streamlit as st
-import psutil
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import matplotlib.animation as animation
-from datetime import datetime
 import logging
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from task_alerts import ALERT_LOG, AlertEngine
+from task_backend import make_data_backend
+from task_charts import build_metrics_figure, create_figure, metrics_figure_png
+from task_fleet import FLEET_PORT, FleetServer, run_agent
+from task_metrics import ALL_METRICS, DOWNSAMPLERS, HISTORY_RETENTIONS, MetricsCollector, SharedSampler
+from task_processes import (DEFAULT_FILTER_PARAMS, PROCESS_CLASSIFICATIONS, TOP_N_METRICS, ProcessTable,
+                            process_info_view)
+from task_timings import StageTimings
 
 # Set up Seaborn style for better aesthetics
 sns.set(style="darkgrid")
@@ -13,156 +23,154 @@ sns.set(style="darkgrid")
 # Set up logging with timestamp
 logging.basicConfig(filename='app.log', level=logging.INFO, format='%(asctime)s %(message)s')
 
-# Enable caching for process data
-@st.cache_data(ttl=60)
+@st.cache_resource
+def get_stage_timings():
+    return StageTimings()
+
+@st.cache_resource
+def get_data_backend():
+    return make_data_backend()
+
+@st.cache_resource
+def get_process_table():
+    return ProcessTable(backend=get_data_backend(), min_interval_s=2.0, timings=get_stage_timings())
+
+# Process view used by the top-N panels
 def get_process_info():
-    process_info = []
-    for process in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'io_counters']):
-        try:
-            io_counters = process.info['io_counters']._asdict() if process.info['io_counters'] else {}
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            continue
-        process_info.append({
-            'PID': process.info['pid'],
-            'Name': process.info['name'],
-            'CPU': process.info['cpu_percent'],
-            'Memory': process.info['memory_percent'],
-            **io_counters
-        })
-    return pd.DataFrame(process_info)
+    with get_stage_timings().measure('view.get_process_info'):
+        return process_info_view(get_shared_sampler().latest().processes)
+
+# Collector is kept across reruns so CPU deltas span consecutive ticks
+@st.cache_resource
+def get_metrics_collector():
+    return MetricsCollector(backend=get_data_backend(), process_table=get_process_table(), timings=get_stage_timings())
+
+@st.cache_resource
+def get_shared_sampler():
+    return SharedSampler(get_metrics_collector(), get_process_table())
 
 # Function to get system metrics
 def get_system_metrics(selected_metrics):
-    metrics = {'Time': datetime.now().strftime('%H:%M:%S')}
-    if 'CPU Usage (%)' in selected_metrics:
-        metrics['CPU Usage (%)'] = psutil.cpu_percent(interval=1)
-    if 'Memory Usage (%)' in selected_metrics:
-        metrics['Memory Usage (%)'] = psutil.virtual_memory().percent
-    if 'Disk Usage (%)' in selected_metrics:
-        metrics['Disk Usage (%)'] = psutil.disk_usage('/').percent
-    if 'Network (Bytes Sent)' in selected_metrics:
-        net_io = psutil.net_io_counters()
-        metrics['Network (Bytes Sent)'] = net_io.bytes_sent
-    if 'Network (Bytes Received)' in selected_metrics:
-        net_io = psutil.net_io_counters()
-        metrics['Network (Bytes Received)'] = net_io.bytes_recv
-    if 'Network (Bytes Sent+Received)' in selected_metrics:
-        net_io = psutil.net_io_counters()
-        metrics['Network (Bytes Sent+Received)'] = net_io.bytes_sent + net_io.bytes_recv
-    if 'Processes Count' in selected_metrics:
-        metrics['Processes Count'] = len(psutil.pids())
-    if 'Threads Count' in selected_metrics:
-        metrics['Threads Count'] = sum(p.num_threads() for p in psutil.process_iter())
-    if 'Battery (%)' in selected_metrics and psutil.sensors_battery():
-        metrics['Battery (%)'] = psutil.sensors_battery().percent
-    if 'Swap Memory Usage (%)' in selected_metrics:
-        metrics['Swap Memory Usage (%)'] = psutil.swap_memory().percent
-    if 'Disk Read Bytes' in selected_metrics:
-        metrics['Disk Read Bytes'] = psutil.disk_io_counters().read_bytes
-    if 'Disk Write Bytes' in selected_metrics:
-        metrics['Disk Write Bytes'] = psutil.disk_io_counters().write_bytes
-    if 'CPU Temperature' in selected_metrics:
-        # Example: Assuming availability; adjust accordingly
-        metrics['CPU Temperature'] = psutil.sensors_temperatures().get('coretemp', [{}])[0].current
-    if 'Battery Time Left (Minutes)' in selected_metrics and psutil.sensors_battery():
-        metrics['Battery Time Left (Minutes)'] = psutil.sensors_battery().secsleft // 60
-    if 'Network Errors' in selected_metrics:
-        net_io = psutil.net_io_counters()
-        metrics['Network Errors'] = net_io.errin + net_io.errout
-    if 'Network Drops' in selected_metrics:
-        net_io = psutil.net_io_counters()
-        metrics['Network Drops'] = net_io.dropin + net_io.dropout
-    if 'CPU Frequency (Current)' in selected_metrics:
-        metrics['CPU Frequency (Current)'] = psutil.cpu_freq().current
-    if 'CPU Frequency (Min)' in selected_metrics:
-        metrics['CPU Frequency (Min)'] = psutil.cpu_freq().min
-    if 'CPU Frequency (Max)' in selected_metrics:
-        metrics['CPU Frequency (Max)'] = psutil.cpu_freq().max
-    if 'Virtual Memory Total (MB)' in selected_metrics:
-        metrics['Virtual Memory Total (MB)'] = psutil.virtual_memory().total / (1024 * 1024)
-    if 'Virtual Memory Available (MB)' in selected_metrics:
-        metrics['Virtual Memory Available (MB)'] = psutil.virtual_memory().available / (1024 * 1024)
-    if 'Disk Total Space (GB)' in selected_metrics:
-        metrics['Disk Total Space (GB)'] = psutil.disk_usage('/').total / (1024 * 1024 * 1024)
-    if 'Disk Free Space (GB)' in selected_metrics:
-        metrics['Disk Free Space (GB)'] = psutil.disk_usage('/').free / (1024 * 1024 * 1024)
-
-    return metrics
+    metrics = get_shared_sampler().latest().metrics
+    return {'Time': metrics['Time'], **{m: metrics[m] for m in selected_metrics if m in metrics}}
+
+# Evaluated on every sample of the shared sampler, over its 1-second history
+@st.cache_resource
+def get_alert_engine():
+    sampler = get_shared_sampler()
+    engine = AlertEngine(log_path=os.environ.get('TASK_MANAGER_ALERT_LOG', ALERT_LOG), timings=get_stage_timings(),
+                         history=sampler.histories[1])
+    sampler.listeners.append(engine.observe)
+    return engine
+
+# Chart rendering backends for the metric time series. Native draws Streamlit line charts that
+# the browser renders from the downsampled points; matplotlib renders a static image on the
+# server every refresh and is kept as the fallback and PNG export path.
+CHART_BACKENDS = ['Native (Streamlit charts)', 'Matplotlib (static)']
+
+# Visible time windows for the metric charts, in seconds (None shows the whole history)
+VISIBLE_WINDOWS = {
+    'Last 5 minutes': 300,
+    'Last hour': 3600,
+    'Last 24 hours': 24 * 3600,
+    'Whole history': None,
+}
 
 # Function to plot the metrics
 def plot_metrics(metrics_df, selected_metrics):
-    num_metrics = len(selected_metrics)
-    num_rows = (num_metrics + 1) // 2  # Calculate rows needed
+    with get_stage_timings().measure('render.plot_metrics'):
+        fig = build_metrics_figure(metrics_df, selected_metrics)
+        st.pyplot(fig)
+        plt.close(fig)
 
-    fig, axs = plt.subplots(num_rows, 2, figsize=(12, num_rows * 4))
-    axs = axs.flatten()  # Flatten in case of a single row
+# Live region of the task manager page. Wrapped in st.fragment so that, when live monitoring
+# is on, only this panel reruns on each tick; the sidebar and process table are left alone.
+def metrics_panel(selected_metrics, top_n, view):
+    started = time.perf_counter()
 
-    for i, metric in enumerate(selected_metrics):
-        sns.lineplot(x='Time', y=metric, data=metrics_df, ax=axs[i])
-        axs[i].set_title(metric)
+    # Fetch and display the current system metrics
+    metrics = get_system_metrics(selected_metrics)
 
-    for j in range(i + 1, len(axs)):
-        fig.delaxes(axs[j])
+    # Display the current system metrics
+    st.write("Current System Metrics:")
+    st.write(pd.DataFrame([metrics]))
 
-    plt.tight_layout()
-    st.pyplot(fig)
+    # Plot the metrics over time
+    if selected_metrics:
+        plot_metrics(get_shared_sampler().visible_metrics(selected_metrics, **view), selected_metrics)
 
-# Function to create and return the figure for each selected metric
-def create_figure(metric, process_df, top_n):
-    fig, ax = plt.subplots()
-    top_processes = process_df.nlargest(top_n, metric)
-    ax.barh(top_processes['Name'], top_processes[metric])
-    ax.set_xlabel(metric)
-    ax.set_title(f'Top {top_n} Processes by {metric}')
-    return fig, ax
+    # Top processes, read from the shared process table
+    process_df = get_process_info()
+    plot_columns = st.columns(len(TOP_N_METRICS))
+    for column, metric in zip(plot_columns, TOP_N_METRICS):
+        with get_stage_timings().measure('render.create_figure'):
+            fig, ax = create_figure(metric, process_df, top_n)
+            with column:
+                st.pyplot(fig)
+            plt.close(fig)
 
-# Update plot for animation
-def update_plot(frame, figs, axes, process_df, selected_metrics, top_n):
+    get_stage_timings().record('refresh.metrics_panel', (time.perf_counter() - started) * 1000)
+
+# Function to draw the top-N process bar charts, one per container
+def draw_top_processes(slots, top_n):
     process_df = get_process_info()
-    for i, metric in enumerate(selected_metrics):
-        top_processes = process_df.nlargest(top_n, metric)
-        axes[i].clear()
-        axes[i].barh(top_processes['Name'], top_processes[metric])
-        axes[i].set_xlabel(metric)
-        axes[i].set_title(f'Top {top_n} Processes by {metric}')
+    with get_stage_timings().measure('render.top_processes'):
+        for slot, metric in zip(slots, TOP_N_METRICS):
+            top_processes = process_df.nlargest(top_n, metric).set_index('Name')
+            slot.bar_chart(top_processes[metric], horizontal=True, x_label=metric, height=250)
+
+# Native-chart variant of the live panel. Every run draws Streamlit line charts from the
+# visible window, downsampled to the chart width, so each live tick sends a payload bounded by
+# the width whatever the history length. Live ticks are fragment reruns on a timer, so nothing
+# holds the script run open and other fragments (the alert banner) keep refreshing.
+def native_metrics_panel(selected_metrics, top_n, view):
+    started = time.perf_counter()
+
+    st.write("Current System Metrics:")
+    st.write(pd.DataFrame([get_system_metrics(selected_metrics)]))
+
+    visible_df = get_shared_sampler().visible_metrics(selected_metrics, **view)
+    metrics_df = visible_df.set_index('Time')
+    chart_columns = st.columns(2)
+    with get_stage_timings().measure('render.line_charts'):
+        for i, metric in enumerate(selected_metrics):
+            with chart_columns[i % 2]:
+                st.caption(metric)
+                st.line_chart(metrics_df[[metric]].dropna(), height=250)
+
+    if selected_metrics and st.button("Export charts (PNG)"):
+        st.download_button("Download PNG", metrics_figure_png(visible_df, selected_metrics),
+                           file_name='system_metrics.png', mime='image/png')
+
+    draw_top_processes(st.columns(len(TOP_N_METRICS)), top_n)
+    get_stage_timings().record('refresh.native_panel', (time.perf_counter() - started) * 1000)
 
 # Function to get processes info based on classification
-def get_processes_info(classification):
-    processes = []
-    for process in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'num_threads', 
-                                        'username', 'status', 'create_time', 'cpu_times', 'io_counters']):
-        process_info = process.info
-        process_info['create_time'] = pd.to_datetime(process_info['create_time'], unit='s')
-
-        if classification == 'High CPU Usage':
-            if process_info['cpu_percent'] > 10:  # Example threshold
-                processes.append(process_info)
-        elif classification == 'High Memory Usage':
-            if process_info['memory_percent'] > 10:  # Example threshold
-                processes.append(process_info)
-        elif classification == 'Running':
-            if process_info['status'] == 'running':
-                processes.append(process_info)
-        elif classification == 'Stopped':
-            if process_info['status'] == 'stopped':
-                processes.append(process_info)
-        else:
-            processes.append(process_info)
-    
-    return pd.DataFrame(processes)
+def get_processes_info(classification, params=None):
+    params = {**DEFAULT_FILTER_PARAMS, **(params or {})}
+    processes = get_shared_sampler().latest().processes
+    with get_stage_timings().measure('view.get_processes_info'):
+        return PROCESS_CLASSIFICATIONS[classification](processes, params)
+
+@st.cache_resource
+def get_fleet_server():
+    return FleetServer(host=os.environ.get('TASK_MANAGER_FLEET_BIND', '127.0.0.1'),
+                       port=int(os.environ.get('TASK_MANAGER_FLEET_PORT', FLEET_PORT)))
+
+# Firing alerts, refreshed on its own so the banner stays current while the page is idle
+def alerts_banner():
+    active = get_alert_engine().active()
+    for rule, since in zip(active['Rule'], active['Since']):
+        st.error(f"Alert: {rule} (since {since})")
 
 # Page 1: Task Manager and System Metrics
 def task_manager_page():
     st.title("Simulated Task Manager with System Metrics")
+    get_shared_sampler()
+    st.fragment(alerts_banner, run_every=2)()
 
     # Metric selection with search functionality
-    all_metrics = ['CPU Usage (%)', 'Memory Usage (%)', 'Disk Usage (%)',
-                   'Network (Bytes Sent)', 'Network (Bytes Received)', 'Network (Bytes Sent+Received)', 
-                   'Processes Count', 'Threads Count', 'Battery (%)', 'Swap Memory Usage (%)', 
-                   'Disk Read Bytes', 'Disk Write Bytes', 'CPU Temperature', 'Battery Time Left (Minutes)', 
-                   'Network Errors', 'Network Drops', 'CPU Frequency (Current)', 
-                   'CPU Frequency (Min)', 'CPU Frequency (Max)', 'Virtual Memory Total (MB)', 
-                   'Virtual Memory Available (MB)', 'Disk Total Space (GB)', 'Disk Free Space (GB)']
+    all_metrics = ALL_METRICS
 
     selected_metrics = st.multiselect(
         "Select the metrics to monitor (type to search):",
@@ -175,62 +183,129 @@ def task_manager_page():
     st.sidebar.header("Process Filter")
     classification = st.sidebar.selectbox(
         "Select classification to view processes:",
-        ["All", "High CPU Usage", "High Memory Usage", "Running", "Stopped"]
+        list(PROCESS_CLASSIFICATIONS)
     )
-
-    # Initialize session state for metrics
-    if 'metrics_df' not in st.session_state:
-        st.session_state['metrics_df'] = pd.DataFrame(columns=[
-            'Time', 'CPU Usage (%)', 'Memory Usage (%)', 
-            'Disk Usage (%)', 'Network (Bytes Sent)', 'Network (Bytes Received)', 
-            'Network (Bytes Sent+Received)', 'Processes Count', 'Threads Count', 
-            'Battery (%)', 'Swap Memory Usage (%)', 'Disk Read Bytes', 
-            'Disk Write Bytes', 'CPU Temperature', 'Battery Time Left (Minutes)', 
-            'Network Errors', 'Network Drops', 'CPU Frequency (Current)', 
-            'CPU Frequency (Min)', 'CPU Frequency (Max)', 'Virtual Memory Total (MB)', 
-            'Virtual Memory Available (MB)', 'Disk Total Space (GB)', 
-            'Disk Free Space (GB)'])
-
-    # Fetch and display the current system metrics
-    metrics = get_system_metrics(selected_metrics)
-    st.session_state['metrics_df'] = pd.concat([st.session_state['metrics_df'], pd.DataFrame([metrics])], ignore_index=True)
-
-    # Display the current system metrics
-    st.write("Current System Metrics:")
-    st.write(pd.DataFrame([metrics]))
-
-    # Plot the metrics over time
-    plot_metrics(st.session_state['metrics_df'], selected_metrics)
+    filter_params = {
+        'cpu_threshold': st.sidebar.number_input("High CPU threshold (%)", min_value=0.0, value=DEFAULT_FILTER_PARAMS['cpu_threshold'], step=1.0),
+        'memory_threshold': st.sidebar.number_input("High memory threshold (%)", min_value=0.0, max_value=100.0, value=DEFAULT_FILTER_PARAMS['memory_threshold'], step=1.0),
+        'top_k': top_n,
+    }
+
+    # Sidebar for how much metric history to show; every session reads the sampler's history
+    st.sidebar.header("Metrics History")
+    retention = st.sidebar.selectbox("Retention:", list(HISTORY_RETENTIONS))
+    retention_s, resolution_s = HISTORY_RETENTIONS[retention]
+
+    # Sidebar for live monitoring
+    st.sidebar.header("Live Monitoring")
+    live = st.sidebar.toggle("Auto-refresh metrics", value=False)
+    interval_s = st.sidebar.number_input("Refresh interval (seconds)", min_value=1, max_value=60, value=2, step=1)
+    backend = st.sidebar.selectbox("Chart rendering:", CHART_BACKENDS)
+    view = {
+        'retention_s': retention_s,
+        'resolution_s': resolution_s,
+        'window_s': VISIBLE_WINDOWS[st.sidebar.selectbox("Visible window:", list(VISIBLE_WINDOWS))],
+        'width_px': st.sidebar.number_input("Chart width (px)", min_value=100, max_value=4000, value=600, step=50),
+        'method': st.sidebar.selectbox("Downsampling:", DOWNSAMPLERS),
+    }
+
+    # Metrics and top-N panels go above the process table
+    panel = st.container()
 
     # Display the processes based on classification
-    processes_df = get_processes_info(classification)
+    processes_df = get_processes_info(classification, filter_params)
     st.write(f"Processes - {classification}:")
-    st.dataframe(processes_df)
-
-    # Button to start monitoring
-    start_monitoring = st.button('Start Monitoring')
-
-    if start_monitoring:
-        process_df = get_process_info()
-
-        # Create figures and axes for each metric
-        figs, axes = [], []
-        for metric in selected_metrics:
-            fig, ax = create_figure(metric, process_df, top_n)
-            figs.append(fig)
-            axes.append(ax)
-
-        # Display plots in Streamlit
-        plot_columns = st.columns(len(selected_metrics))
-        for i, fig in enumerate(figs):
-            with plot_columns[i]:
-                st.pyplot(fig)
-
-        # Start animation
-        for i, metric in enumerate(selected_metrics):
-            animation.FuncAnimation(figs[i], update_plot, fargs=([figs[i]], [axes[i]], process_df, [metric], top_n), interval=1000)
-
-# Page 2: README or About This Solution
+    with get_stage_timings().measure('render.dataframe'):
+        st.dataframe(processes_df)
+
+    # Only the panel reruns on each live tick
+    with panel:
+        panel_fn = native_metrics_panel if backend == 'Native (Streamlit charts)' else metrics_panel
+        st.fragment(panel_fn, run_every=interval_s if live else None)(selected_metrics, top_n, view)
+
+# Page 2: Fleet view merged from every connected agent
+def fleet_panel(top_n, sort_by):
+    server = get_fleet_server()
+    hosts = server.hosts_frame()
+    if hosts.empty:
+        st.write(f"No agents connected yet. Start one per node with "
+                 f"`python 2-sim-task-mgmr.py --agent <dashboard-host>:{server.address[1]}`.")
+        return
+    live = hosts[hosts['Connected']]
+    cols = st.columns(4)
+    cols[0].metric("Hosts connected", f"{len(live)} / {len(hosts)}")
+    cols[1].metric("Processes", int(live['Processes'].sum()))
+    cols[2].metric("Mean CPU Usage (%)", f"{live['CPU Usage (%)'].mean():.1f}")
+    cols[3].metric("Mean bytes/frame", f"{live['Bytes/frame'].mean():.0f}")
+    st.dataframe(hosts[['Host', 'Connected', 'Age (s)', 'Processes', 'Frames', 'Bytes/frame', 'CPU Usage (%)',
+                        'Memory Usage (%)', 'Swap Memory Usage (%)', 'Disk Usage (%)', 'Threads Count']],
+                 hide_index=True)
+
+    st.subheader(f"Top {top_n} processes across the fleet by {sort_by}")
+    processes = server.processes_frame()
+    st.dataframe(processes.nlargest(top_n, sort_by)[['host', 'pid', 'name', 'status', 'cpu_percent', 'memory_percent',
+                                                     'io_bytes_per_s', 'num_threads']], hide_index=True)
+
+def fleet_page():
+    st.title("Fleet")
+    top_n = st.slider('Top processes across all hosts', 1, 50, 10)
+    sort_by = st.selectbox("Rank by:", ['cpu_percent', 'memory_percent', 'io_bytes_per_s', 'num_threads'])
+    live = st.sidebar.toggle("Auto-refresh fleet", value=True)
+    st.fragment(fleet_panel, run_every=2 if live else None)(top_n, sort_by)
+
+# Page 3: Alert rules, firing alerts and the alert history
+def alerts_panel():
+    engine = get_alert_engine()
+    active = engine.active()
+    st.subheader(f"Firing ({len(active)})")
+    if active.empty:
+        st.write("No alerts are firing.")
+    else:
+        st.dataframe(active, hide_index=True)
+    st.subheader("Recent events")
+    st.dataframe(engine.recent_events(), hide_index=True)
+
+def alerts_page():
+    st.title("Alerts")
+    engine = get_alert_engine()
+    st.write("One rule per line, e.g. `CPU Usage (%) > 90 for 30s`, `Disk Usage (%) >= 95 clear 90` or "
+             "`Swap Memory Usage (%) rising 5%/min over 5m`. Rules apply to every session.")
+    rules = st.text_area("Rules", value='\n'.join(rule['text'] for rule in engine.rules), height=160)
+    if st.button("Apply rules"):
+        errors = engine.set_rules(rules.splitlines())
+        for error in errors:
+            st.error(error)
+        st.success(f"{len(engine.rules)} rules active")
+    st.caption(f"Fired and resolved alerts are appended to {engine.log_path}; a rule re-firing within "
+               f"{engine.cooldown_s:.0f} s of its last alert is not reported again.")
+    st.fragment(alerts_panel, run_every=2)()
+
+# Page 4: Collector and render diagnostics
+def diagnostics_page():
+    st.title("Diagnostics")
+    timings = get_stage_timings()
+
+    budget_ms = st.number_input("Refresh latency budget (ms)", min_value=0, value=int(timings.budget_ms or 250), step=10)
+    timings.budget_ms = budget_ms
+    timings.export = st.toggle("Export timings as structured log lines (app.log)", value=timings.export)
+    if st.button("Reset timings"):
+        timings.reset()
+
+    summary = timings.summary()
+    if summary.empty:
+        st.write("No timings recorded yet. Open the Task Manager page first.")
+        return
+
+    refresh = summary['Stage'].str.startswith('refresh.')
+    over_budget = refresh & (summary['p95 (ms)'] > budget_ms)
+    summary['Budget'] = np.where(refresh, np.where(over_budget, 'over', 'ok'), '')
+    if over_budget.any():
+        st.warning(f"p95 refresh latency is over the {budget_ms} ms budget for: {', '.join(summary.loc[over_budget, 'Stage'])}")
+    st.write(f"Rolling percentiles over the last {timings.window} measurements of each stage:")
+    st.dataframe(summary.style.format(precision=2), hide_index=True)
+    st.bar_chart(summary.set_index('Stage')[['p50 (ms)', 'p95 (ms)', 'p99 (ms)']], horizontal=True, stack=False)
+
+# Page 5: README or About This Solution
 def readme_page():
     st.title("README / About This Solution")
     
@@ -242,13 +317,16 @@ def readme_page():
     - **Real-time Monitoring**: Get up-to-date information on system performance and resource utilization.
     - **Process Filtering**: Filter processes based on criteria such as high CPU usage, high memory usage, running, and stopped processes.
     - **Interactive Visualization**: Use Seaborn for visually appealing real-time graphs of system metrics.
-    - **Animated Charts**: Real-time animations for selected metrics to better understand system dynamics.
+    - **Live Monitoring**: An auto-refreshing panel updates the metric charts and top processes at a chosen interval without rerunning the rest of the page.
+    - **Threshold Alerts**: Declarative rules such as "CPU Usage (%) > 90 for 30s" or "Swap Memory Usage (%) rising 5%/min" are checked on every sample; firing alerts show on the Task Manager and Alerts pages and are appended to `alerts.log`.
+    - **Fleet View**: Run `python 2-sim-task-mgmr.py --agent <dashboard-host>:8765` on each node; agents stream compact delta snapshots and the "Fleet" page merges all hosts with a cross-host top-N.
 
     ## How to Use
     1. Navigate to the "Task Manager" page to start monitoring system processes and metrics.
     2. Use the sidebar to filter processes according to your needs.
     3. Select metrics you want to visualize and set the number of top processes to display.
-    4. Click "Start Monitoring" to begin the process.
+    4. Turn on "Auto-refresh metrics" in the sidebar and pick a refresh interval to start live monitoring.
+    5. Open the "Alerts" page to edit the alert rules and review firing and past alerts.
 
     ## Technology Stack
     - **Streamlit**: The app framework used to build this interactive web application.
@@ -257,7 +335,8 @@ def readme_page():
 
     ## Future Enhancements
     - Integrate more metrics like temperature, battery status, and more.
-    - Add alerts for threshold breaches.
+    - Send alerts to external channels (email, chat, paging) in addition to the in-app panel and alert log.
+    - Evaluate alert rules against fleet hosts as well as the local machine.
     - Provide historical data and trends.
 
     ## Author
@@ -266,13 +345,35 @@ def readme_page():
 
 # Main Function to Handle Page Navigation
 def main():
+    # Starts the shared sampler and alert evaluation whichever page is opened first
+    get_alert_engine()
     st.sidebar.title("Navigation")
-    page = st.sidebar.selectbox("Select a Page", ["Task Manager", "README / About This Solution"])
+    page = st.sidebar.selectbox("Select a Page", ["Task Manager", "Fleet", "Alerts", "Diagnostics", "README / About This Solution"])
 
     if page == "Task Manager":
         task_manager_page()
+    elif page == "Fleet":
+        fleet_page()
+    elif page == "Alerts":
+        alerts_page()
+    elif page == "Diagnostics":
+        diagnostics_page()
     elif page == "README / About This Solution":
         readme_page()
 
+# Headless agent mode: python 2-sim-task-mgmr.py --agent HOST:PORT [--interval S] [--name NAME]
+def agent_main(argv):
+    parser = argparse.ArgumentParser(description="Stream this host's metrics and processes to a fleet dashboard")
+    parser.add_argument('--agent', required=True, metavar='HOST:PORT')
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--name', help="host name shown in the fleet view (default: this machine's hostname)")
+    args = parser.parse_args(argv)
+    host, _, port = args.agent.rpartition(':')
+    logging.getLogger().addHandler(logging.StreamHandler())
+    run_agent((host or '127.0.0.1', int(port)), args.interval, args.name)
+
 if __name__ == "__main__":
-    main()
+    if '--agent' in sys.argv[1:]:
+        agent_main(sys.argv[1:])
+    else:
+        main()
@@ -3,130 +3,263 @@ import psutil
 import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-import csv
+import atexit
+import glob
 import os
+import threading
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from task_processes import PROCESS_ATTRS, PROCESS_COLUMNS, compute_process_rates, process_row
+
+# Keeps the previous sample between reruns so rates span consecutive samples
+class ProcessSampler:
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._df = None
+        self._prev_counters = None
+        self._sampled_at = None
+
+    def sample(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._sampled_at is None or now - self._sampled_at >= self.ttl:
+                rows = [process_row(p.info) for p in psutil.process_iter(PROCESS_ATTRS, ad_value=None)]
+                df = pd.DataFrame.from_records(rows, columns=PROCESS_COLUMNS)
+                elapsed_s = now - self._sampled_at if self._sampled_at is not None else 0
+                rates, self._prev_counters = compute_process_rates(df, self._prev_counters, elapsed_s)
+                self._df = pd.concat([df, rates], axis=1)
+                self._sampled_at = now
+            return self._df
+
+@st.cache_resource
+def get_process_sampler():
+    return ProcessSampler(ttl=5)
 
 # Caching the process data retrieval
-@st.cache_data(ttl=5)
 def get_process_data():
-    processes = psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'io_counters', 'num_threads', 'status'])
-    process_data = [process.info for process in processes]
-    return pd.DataFrame(process_data)
+    return get_process_sampler().sample()
+
+# Process filters: vectorized status masks and top-k selections over the cached sample
+PROCESS_FILTERS = {
+    "All": lambda df, top_n: df.head(top_n),
+    "Running": lambda df, top_n: df[df['status'] == 'running'].head(top_n),
+    "Stopped": lambda df, top_n: df[df['status'] == 'stopped'].head(top_n),
+    "High CPU Usage": lambda df, top_n: df.nlargest(top_n, 'cpu_percent'),
+    "High Memory Usage": lambda df, top_n: df.nlargest(top_n, 'memory_percent'),
+    "High I/O": lambda df, top_n: df.nlargest(top_n, 'io_bytes_per_s'),
+    "High Threads": lambda df, top_n: df.nlargest(top_n, 'num_threads'),
+    "Low CPU Usage": lambda df, top_n: df.nsmallest(top_n, 'cpu_percent'),
+    "Low Memory Usage": lambda df, top_n: df.nsmallest(top_n, 'memory_percent'),
+}
 
 def plot_process_metrics(fig, ax, df, metric, top_n):
     ax.clear()
-    if metric == 'io_counters':
-        df['io_read_count'] = [tup[0] for tup in df['io_counters']]
-        ax.bar(df['name'].head(top_n), df['io_read_count'].head(top_n))
-        ax.set_ylabel('I/O Read Count')
-    else:
-        ax.bar(df['name'].head(top_n), df[metric].head(top_n))
-        ax.set_ylabel(metric)
+    top = df.nlargest(top_n, metric)
+    ax.bar(top['name'], top[metric])
+    ax.set_ylabel(metric)
     ax.set_xlabel('Process')
     ax.set_title(f'Top {top_n} Processes by {metric}')
     plt.xticks(rotation=45, ha='right')
     fig.tight_layout()
     return fig
 
-def update_plot(frame, figs, axes, process_df, metrics, top_n):
+# Live region of the page; wrapped in st.fragment so only this part reruns on each refresh
+def live_panel(selected_metrics, top_n):
     process_df = get_process_data()
-    for fig, ax, metric in zip(figs, axes, metrics):
-        plot_process_metrics(fig, ax, process_df, metric, top_n)
-    return figs
 
-def log_system_metrics(cpu_usage, memory_usage):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_file = "system_metrics.csv"
-    
-    if not os.path.exists(log_file):
-        with open(log_file, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(["Timestamp", "CPU Usage", "Memory Usage"])
-    
-    with open(log_file, 'a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([timestamp, cpu_usage, memory_usage])
+    # Visualizations
+    st.header("Process Metrics")
+    if selected_metrics:
+        cols = st.columns(len(selected_metrics))
+        for col, metric in zip(cols, selected_metrics):
+            fig, ax = plt.subplots(figsize=(8, 6))
+            plot_process_metrics(fig, ax, process_df, metric, top_n)
+            with col:
+                st.subheader(f"{metric.capitalize()} Usage")
+                st.pyplot(fig)
+            plt.close(fig)
+
+    # Display additional information
+    st.header("System Information")
+    col1, col2 = st.columns(2)
+
+    system_metrics = collect_system_metrics()
+
+    with col1:
+        st.metric("CPU Usage", f"{system_metrics['cpu_percent']}%")
+
+    with col2:
+        st.metric("Memory Usage", f"{system_metrics['memory_percent']}%")
+
+    st.write(f"Startup Time: {datetime.datetime.fromtimestamp(psutil.boot_time()).strftime('%Y-%m-%d %H:%M:%S')}")
+
+    # Log system metrics
+    log_system_metrics(system_metrics)
+
+# System-wide metrics recorded on every refresh
+SYSTEM_METRIC_COLUMNS = ['cpu_percent', 'memory_percent', 'memory_available_mb', 'swap_percent',
+                         'disk_percent', 'disk_free_gb', 'disk_read_bytes', 'disk_write_bytes',
+                         'net_bytes_sent', 'net_bytes_recv', 'net_errors', 'net_drops', 'process_count']
+
+def collect_system_metrics():
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+    disk_io = psutil.disk_io_counters()
+    net_io = psutil.net_io_counters()
+    return {
+        # Non-blocking: usage since the previous call
+        'cpu_percent': psutil.cpu_percent(interval=None),
+        'memory_percent': memory.percent,
+        'memory_available_mb': memory.available / (1024 * 1024),
+        'swap_percent': psutil.swap_memory().percent,
+        'disk_percent': disk.percent,
+        'disk_free_gb': disk.free / (1024 * 1024 * 1024),
+        'disk_read_bytes': disk_io.read_bytes if disk_io else np.nan,
+        'disk_write_bytes': disk_io.write_bytes if disk_io else np.nan,
+        'net_bytes_sent': net_io.bytes_sent,
+        'net_bytes_recv': net_io.bytes_recv,
+        'net_errors': net_io.errin + net_io.errout,
+        'net_drops': net_io.dropin + net_io.dropout,
+        'process_count': len(psutil.pids()),
+    }
+
+# Append-only metrics store. Samples are buffered in memory and flushed as Parquet files into
+# hourly partitions (date=YYYY-MM-DD/hour=HH) once flush_rows samples or flush_interval_s
+# seconds have accumulated. Partitions of finished hours are compacted into a single file,
+# and range queries only open the partitions that overlap the requested range.
+class MetricsStore:
+    def __init__(self, root='system_metrics', flush_rows=720, flush_interval_s=300):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._open_partitions = set()
+        atexit.register(self.flush)
+
+    def _partition_dir(self, timestamp):
+        return os.path.join(self.root, f"date={timestamp:%Y-%m-%d}", f"hour={timestamp:%H}")
+
+    def append(self, metrics, timestamp=None):
+        timestamp = timestamp or datetime.datetime.now()
+        with self._lock:
+            self._buffer.append({'timestamp': timestamp, **metrics})
+            if len(self._buffer) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval_s:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        df = pd.DataFrame(self._buffer)
+        self._buffer = []
+        for hour, part in df.groupby(df['timestamp'].dt.floor('h')):
+            directory = self._partition_dir(hour)
+            os.makedirs(directory, exist_ok=True)
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False),
+                           os.path.join(directory, f"part-{time.time_ns()}.parquet"))
+            self._open_partitions.add(directory)
+
+        current = self._partition_dir(datetime.datetime.now())
+        for directory in self._open_partitions - {current}:
+            self._compact(directory)
+        self._open_partitions &= {current}
+
+    def _compact(self, directory):
+        parts = sorted(glob.glob(os.path.join(directory, 'part-*.parquet')))
+        if len(parts) < 2:
+            return
+        table = pa.concat_tables([pq.read_table(part) for part in parts], promote_options='default')
+        tmp_path = os.path.join(directory, 'compact.tmp')
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(directory, f"part-{time.time_ns()}.parquet"))
+        for part in parts:
+            os.remove(part)
+
+    # Samples recorded between start and end (inclusive), including ones not yet flushed
+    def query(self, start, end, columns=None):
+        columns = list(columns or SYSTEM_METRIC_COLUMNS)
+        with self._lock:
+            files = []
+            hour = start.replace(minute=0, second=0, microsecond=0)
+            while hour <= end:
+                files.extend(glob.glob(os.path.join(self._partition_dir(hour), 'part-*.parquet')))
+                hour += datetime.timedelta(hours=1)
+            frames = []
+            if files:
+                dataset = pq.ParquetDataset(files, filters=[('timestamp', '>=', start), ('timestamp', '<=', end)])
+                frames.append(dataset.read(columns=['timestamp'] + columns).to_pandas())
+            buffered = pd.DataFrame(self._buffer, columns=['timestamp'] + SYSTEM_METRIC_COLUMNS)
+        buffered = buffered[(buffered['timestamp'] >= start) & (buffered['timestamp'] <= end)]
+        frames.append(buffered[['timestamp'] + columns])
+        return pd.concat(frames, ignore_index=True).sort_values('timestamp', ignore_index=True)
+
+@st.cache_resource
+def get_metrics_store():
+    return MetricsStore()
+
+def log_system_metrics(system_metrics):
+    get_metrics_store().append(system_metrics)
+
+# Time ranges offered on the History page
+HISTORY_RANGES = {
+    'Last hour': datetime.timedelta(hours=1),
+    'Last 24 hours': datetime.timedelta(days=1),
+    'Last 7 days': datetime.timedelta(days=7),
+    'Last 30 days': datetime.timedelta(days=30),
+}
+
+def history_page():
+    st.title("Metrics History")
+    range_choice = st.selectbox("Time range:", list(HISTORY_RANGES))
+    columns = st.multiselect("Metrics:", SYSTEM_METRIC_COLUMNS, default=['cpu_percent', 'memory_percent'])
+    if not columns:
+        return
+
+    end = datetime.datetime.now()
+    history_df = get_metrics_store().query(end - HISTORY_RANGES[range_choice], end, columns)
+    st.caption(f"{len(history_df)} samples")
+    st.line_chart(history_df.set_index('timestamp')[columns])
 
 def main():
     st.set_page_config(page_title="Simple Task Manager", layout="wide")
     
     # Navigation
-    page = st.sidebar.selectbox("Select a page", ["Task Manager", "About"])
+    page = st.sidebar.selectbox("Select a page", ["Task Manager", "History", "About"])
     
     if page == "Task Manager":
         st.title("Task Manager")
 
         # Process Information
         st.sidebar.header("Process Filters")
-        filter_options = ["All", "Running", "Stopped", "High CPU Usage", "High Memory Usage", "High I/O", "High Threads", "Low CPU Usage", "Low Memory Usage"]
-        filter_choice = st.sidebar.selectbox("Filter processes by:", filter_options)
+        filter_choice = st.sidebar.selectbox("Filter processes by:", list(PROCESS_FILTERS))
         top_n = st.sidebar.number_input("Number of processes to display", min_value=5, max_value=20, value=10, step=1)
-        metric_options = ["cpu_percent", "memory_percent", "io_counters", "num_threads"]
+        metric_options = ["cpu_percent", "memory_percent", "io_bytes_per_s", "num_threads"]
         selected_metrics = st.sidebar.multiselect("Select process metrics to visualize:", metric_options)
+        live = st.sidebar.toggle("Live refresh", value=False)
+        refresh_s = st.sidebar.number_input("Refresh interval (seconds)", min_value=1, max_value=60, value=5, step=1)
 
         process_df = get_process_data()
 
         # Filter processes based on user selection
-        if filter_choice == "High CPU Usage":
-            process_df = process_df.nlargest(top_n, 'cpu_percent')
-        elif filter_choice == "High Memory Usage":
-            process_df = process_df.nlargest(top_n, 'memory_percent')
-        elif filter_choice == "High I/O":
-            process_df = process_df.nlargest(top_n, 'io_counters')
-        elif filter_choice == "High Threads":
-            process_df = process_df.nlargest(top_n, 'num_threads')
-        elif filter_choice == "Low CPU Usage":
-            process_df = process_df.nsmallest(top_n, 'cpu_percent')
-        elif filter_choice == "Low Memory Usage":
-            process_df = process_df.nsmallest(top_n, 'memory_percent')
-        elif filter_choice == "Running":
-            process_df = process_df[process_df['status'] == 'running'].head(top_n)
-        elif filter_choice == "Stopped":
-            process_df = process_df[process_df['status'] == 'stopped'].head(top_n)
-        else:
-            process_df = process_df.head(top_n)
+        process_df = PROCESS_FILTERS[filter_choice](process_df, top_n)
 
         # Display processes
         st.dataframe(process_df)
 
-        # Visualizations
-        st.header("Process Metrics")
-
-        # Create a figure and axis for each selected metric
-        figs, axes = [], []
-        for metric in selected_metrics:
-            fig, ax = plt.subplots(figsize=(8, 6))
-            figs.append(fig)
-            axes.append(ax)
-
-        # Update the plots every second
-        metric_animation = animation.FuncAnimation(figs, update_plot, fargs=(figs, axes, process_df, selected_metrics, top_n), interval=1000)
+        # Live charts and system information, refreshed on their own
+        st.fragment(live_panel, run_every=refresh_s if live else None)(selected_metrics, top_n)
 
-        # Display the plots
-        cols = st.columns(len(selected_metrics))
-        for i, (fig, metric) in enumerate(zip(figs, selected_metrics)):
-            with cols[i]:
-                st.subheader(f"{metric.capitalize()} Usage")
-                st.pyplot(fig)
-
-        # Display additional information
-        st.header("System Information")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            cpu_usage = psutil.cpu_percent(interval=1)
-            st.metric("CPU Usage", f"{cpu_usage}%")
-
-        with col2:
-            memory = psutil.virtual_memory()
-            memory_usage = memory.percent
-            st.metric("Memory Usage", f"{memory_usage}%")
-
-        st.write(f"Startup Time: {datetime.datetime.fromtimestamp(psutil.boot_time()).strftime('%Y-%m-%d %H:%M:%S')}")
-
-        # Log system metrics
-        log_system_metrics(cpu_usage, memory_usage)
+    elif page == "History":
+        history_page()
 
     elif page == "About":
         st.title("About This Task Manager")
@@ -141,35 +274,37 @@ def main():
         - `psutil`: For retrieving information about system processes and resources
         - `pandas`: For data manipulation and analysis
         - `matplotlib`: For creating visualizations
-        - `csv`: For logging system metrics to a CSV file
+        - `pyarrow`: For storing logged system metrics as partitioned Parquet files
 
         ### 2. Key Functions
 
         #### `get_process_data()`
         - Retrieves information about running processes using `psutil.process_iter()`
-        - Returns a pandas DataFrame with process information
-        - Cached using `@st.cache_data(ttl=5)` to improve performance (cache expires after 5 seconds)
+        - Returns a pandas DataFrame with process information, with I/O and CPU counters expanded into numeric columns
+        - Sampled at most every 5 seconds; the previous sample is kept so CPU %, I/O bytes/s and context switches/s are computed as per-second rates
 
         #### `plot_process_metrics()`
-        - Creates bar plots for the selected process metrics
-        - Handles special case for 'io_counters' metric
+        - Creates bar plots of the top processes for the selected process metrics
 
-        #### `update_plot()`
-        - Updates the plots with the latest process data
-        - Called by `animation.FuncAnimation()` to create animated plots
+        #### `live_panel()`
+        - Draws the process metric charts and system information from the latest process data
+        - Wrapped in `st.fragment(run_every=...)` so, with "Live refresh" on, only this panel reruns at the chosen interval
 
         #### `log_system_metrics()`
-        - Logs CPU and memory usage to a CSV file ('system_metrics.csv')
-        - Creates the file if it doesn't exist, otherwise appends to it
+        - Logs the full set of system metrics (CPU, memory, swap, disk, network, process count) to `MetricsStore`
+        - Samples are buffered in memory and flushed in batches to append-only Parquet files under `system_metrics/`, partitioned by date and hour
+
+        #### `history_page()`
+        - Charts logged metrics over a chosen time range, reading only the hourly partitions that overlap it
 
         ### 3. Main Application Flow
 
         1. User selects filters and metrics in the sidebar
         2. Process data is retrieved and filtered based on user selection
         3. Filtered process data is displayed in a table
-        4. Animated plots are created for selected metrics
+        4. Plots are created for selected metrics, refreshed live when "Live refresh" is on
         5. Overall system information (CPU usage, Memory usage, Startup time) is displayed
-        6. System metrics are logged to a CSV file
+        6. System metrics are buffered and logged to the partitioned metrics store
 
         ### 4. Features
 
@@ -183,8 +318,6 @@ def main():
 
         - Implement more advanced filtering and sorting options
         - Add network usage monitoring
-        - Create historical views of system performance
-        - Implement database storage for logged metrics instead of CSV
         - Add process termination functionality
 
         ### 6. Running the Application
@@ -2,57 +2,264 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from io import StringIO
+import argparse
+import base64
+import io
+import os
+from multiprocessing import Pool
+import numpy as np
+from feedback_data import CATEGORICAL_COLUMNS, DATA_FILE, iter_feedback_csv, load_feedback
 
 # # Assuming the data is in a string variable called 'data_string'
 # data = StringIO('''Request ID	Customer ID	Customer Name	Customer Company	Request Date	Service Type	Capability	Issue Description	Assigned Team	Resolution Time (hours)	Status	Customer Feedback	Customer Rating (1-5)	Escalation (Yes/No)	Complaint	Compliment	General Comment	Expectation	Sentiment
 # c6406163-5b3d-4b4d-ae6f-cdfd49d8ac26	8acdc93c-3376-4f39-8828-8002e9b7166a	Michael Young	Miller-Flores	05/03/2024	On-site Support	Cloud Services	Daughter second story class involve out might near.	Team D	13.37	Resolved	Once so leave could.	1	No	Age participant visit west claim article.	War or event company.		Focus garden dog fire send stay.	Neutral
 # ...''')  # Add the rest of the data here
 
-# Read the data
-#df = pd.read_csv(data, sep='\t')
-df = pd.read_csv('synthetic_it_service_provider_data.csv')
-
-
-# Display basic information about the dataset
-print(df.info())
-
-# Display the first few rows
-print(df.head())
-
-# Check for missing values
-print(df.isnull().sum())
-
-# Display summary statistics
-print(df.describe())
-
-# Display unique values in categorical columns
-categorical_columns = ['Service Type', 'Capability', 'Assigned Team', 'Status', 'Escalation (Yes/No)', 'Sentiment']
-for col in categorical_columns:
-    print(f"\nUnique values in {col}:")
-    print(df[col].value_counts())
-
-# Visualize the distribution of Customer Ratings
-plt.figure(figsize=(10, 6))
-sns.countplot(x='Customer Rating (1-5)', data=df)
-plt.title('Distribution of Customer Ratings')
-plt.show()
-
-# Visualize the relationship between Resolution Time and Customer Rating
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x='Resolution Time (hours)', y='Customer Rating (1-5)', data=df)
-plt.title('Resolution Time vs Customer Rating')
-plt.show()
-
-# Visualize the average Customer Rating by Service Type
-plt.figure(figsize=(12, 6))
-df.groupby('Service Type')['Customer Rating (1-5)'].mean().sort_values().plot(kind='bar')
-plt.title('Average Customer Rating by Service Type')
-plt.ylabel('Average Customer Rating')
-plt.xticks(rotation=45)
-plt.show()
-
-# Visualize the distribution of Sentiments
-plt.figure(figsize=(10, 6))
-sns.countplot(x='Sentiment', data=df)
-plt.title('Distribution of Sentiments')
-plt.show()
\ No newline at end of file
+# Interactive EDA: loads the whole export and shows each chart in a window
+def interactive_eda(path=DATA_FILE):
+    # Read the data
+    #df = pd.read_csv(data, sep='\t')
+    # Typed schema and binary cache shared with Customer-Feedback-App.py (see feedback_data.py)
+    df = load_feedback(path)
+
+
+    # Display basic information about the dataset
+    print(df.info())
+
+    # Display the first few rows
+    print(df.head())
+
+    # Check for missing values
+    print(df.isnull().sum())
+
+    # Display summary statistics
+    print(df.describe())
+
+    # Display unique values in categorical columns
+    categorical_columns = ['Service Type', 'Capability', 'Assigned Team', 'Status', 'Escalation (Yes/No)', 'Sentiment']
+    for col in categorical_columns:
+        print(f"\nUnique values in {col}:")
+        print(df[col].value_counts())
+
+    # Visualize the distribution of Customer Ratings
+    plt.figure(figsize=(10, 6))
+    sns.countplot(x='Customer Rating (1-5)', data=df)
+    plt.title('Distribution of Customer Ratings')
+    plt.show()
+
+    # Visualize the relationship between Resolution Time and Customer Rating
+    plt.figure(figsize=(10, 6))
+    sns.scatterplot(x='Resolution Time (hours)', y='Customer Rating (1-5)', data=df)
+    plt.title('Resolution Time vs Customer Rating')
+    plt.show()
+
+    # Visualize the average Customer Rating by Service Type
+    plt.figure(figsize=(12, 6))
+    df.groupby('Service Type', observed=True)['Customer Rating (1-5)'].mean().sort_values().plot(kind='bar')
+    plt.title('Average Customer Rating by Service Type')
+    plt.ylabel('Average Customer Rating')
+    plt.xticks(rotation=45)
+    plt.show()
+
+    # Visualize the distribution of Sentiments
+    plt.figure(figsize=(10, 6))
+    sns.countplot(x='Sentiment', data=df)
+    plt.title('Distribution of Sentiments')
+    plt.show()
+
+
+# Streaming EDA for exports too large for memory or for headless servers:
+#   python "Customer Feedback EDA.py" --stream [--workers N] [--block-mb 32] [--report eda-report.html]
+# The file is split into byte ranges of whole rows; a quoted field may span several lines, so
+# ranges only end at newlines outside quotes. Each worker parses its ranges in row chunks and
+# returns a partial summary; partials are merged into a single report, so memory is bounded by
+# block size times workers whatever the file size.
+NUMERIC_COLUMNS = ['Resolution Time (hours)', 'Customer Rating (1-5)']
+# Values are counted at this precision for quantiles, so those are exact up to the precision
+QUANTILE_PRECISION = {'Resolution Time (hours)': 0.01, 'Customer Rating (1-5)': 1}
+RESOLUTION_BIN_HOURS = 4
+
+# Summary of one typed chunk; every field can be merged with the same field of another chunk
+def chunk_partial(chunk):
+    partial = {
+        'rows': len(chunk),
+        'non_null': chunk.notna().sum(),
+        'moments': {},
+        'histograms': {},
+        'value_counts': {column: chunk[column].value_counts().astype('int64') for column in CATEGORICAL_COLUMNS},
+        'service_ratings': chunk.groupby('Service Type', observed=True)['Customer Rating (1-5)'].agg(['sum', 'count']),
+        'resolution_ratings': chunk.groupby([(chunk['Resolution Time (hours)'] // RESOLUTION_BIN_HOURS) * RESOLUTION_BIN_HOURS,
+                                             chunk['Customer Rating (1-5)']]).size(),
+        'head': chunk.head(5),
+    }
+    for column in NUMERIC_COLUMNS:
+        values = chunk[column].dropna().to_numpy(dtype='float64')
+        if len(values):
+            partial['moments'][column] = (len(values), values.mean(), ((values - values.mean()) ** 2).sum(),
+                                          values.min(), values.max())
+        step = QUANTILE_PRECISION[column]
+        partial['histograms'][column] = pd.Series(np.round(values / step) * step).round(6).value_counts()
+    return partial
+
+# Parallel merge of count, mean and sum of squared deviations (Chan et al.)
+def merge_moments(a, b):
+    if a is None or b is None:
+        return a or b
+    n = a[0] + b[0]
+    delta = b[1] - a[1]
+    return (n, a[1] + delta * b[0] / n, a[2] + b[2] + delta ** 2 * a[0] * b[0] / n, min(a[3], b[3]), max(a[4], b[4]))
+
+def add_series(a, b):
+    return b if a is None else a.add(b, fill_value=0)
+
+def merge_partials(a, b):
+    if a is None:
+        return b
+    return {
+        'rows': a['rows'] + b['rows'],
+        'non_null': a['non_null'].add(b['non_null'], fill_value=0),
+        'moments': {c: merge_moments(a['moments'].get(c), b['moments'].get(c)) for c in {*a['moments'], *b['moments']}},
+        'histograms': {c: add_series(a['histograms'].get(c), b['histograms'][c]) for c in b['histograms']},
+        'value_counts': {c: a['value_counts'][c].add(b['value_counts'][c], fill_value=0) for c in a['value_counts']},
+        'service_ratings': a['service_ratings'].add(b['service_ratings'], fill_value=0),
+        'resolution_ratings': a['resolution_ratings'].add(b['resolution_ratings'], fill_value=0),
+        'head': a['head'] if a['head'] is not None else b['head'],
+    }
+
+# Byte ranges of about block_bytes covering every row after the header. One sequential pass
+# finds the quotes and newlines of each block; a newline ends a row when an even number of
+# quotes precedes it (escaped quotes come in pairs, so parity is enough), so ranges never cut
+# a quoted field that spans several lines.
+def byte_ranges(path, block_bytes, scan_bytes=4 * 1024 ** 2):
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        start = offset = len(file.readline())
+        ranges, quoted = [], 0
+        for block in iter(lambda: file.read(scan_bytes), b''):
+            block = np.frombuffer(block, dtype=np.uint8)
+            quotes = np.flatnonzero(block == ord('"'))
+            newlines = np.flatnonzero(block == ord('\n'))
+            outside = (np.searchsorted(quotes, newlines) + quoted) % 2 == 0
+            row_ends = offset + 1 + newlines[outside]
+            while True:
+                i = np.searchsorted(row_ends, start + block_bytes)
+                if i == len(row_ends):
+                    break
+                ranges.append((start, int(row_ends[i])))
+                start = int(row_ends[i])
+            quoted = (quoted + len(quotes)) % 2
+            offset += len(block)
+    if start < size:
+        ranges.append((start, size))
+    return ranges
+
+# Worker: parse the rows in [start, end) in row chunks and merge their partials
+def scan_range(task):
+    path, start, end, chunksize = task
+    with open(path, 'rb') as file:
+        header = file.readline()
+        columns = pd.read_csv(io.BytesIO(header), nrows=0).columns
+        file.seek(start)
+        data = file.read(end - start)
+    merged = None
+    if data.strip():
+        for chunk in iter_feedback_csv(io.BytesIO(data), chunksize, header=None, names=columns):
+            partial = chunk_partial(chunk)
+            if start != len(header):
+                partial['head'] = None
+            merged = merge_partials(merged, partial)
+    return start, merged
+
+# Approximate quantiles from a value histogram
+def histogram_quantiles(histogram, quantiles):
+    histogram = histogram.sort_index()
+    cumulative = histogram.cumsum().to_numpy()
+    positions = np.searchsorted(cumulative, np.array(quantiles) * cumulative[-1], side='left')
+    return histogram.index.to_numpy()[np.minimum(positions, len(histogram) - 1)]
+
+# describe() equivalent from the merged moments and histograms
+def describe_partial(partial):
+    rows = {}
+    for column in [c for c in NUMERIC_COLUMNS if c in partial['moments']]:
+        n, mean, m2, low, high = partial['moments'][column]
+        q25, q50, q75 = histogram_quantiles(partial['histograms'][column], [0.25, 0.5, 0.75])
+        rows[column] = {'count': n, 'mean': mean, 'std': np.sqrt(m2 / (n - 1)) if n > 1 else np.nan,
+                        'min': low, '25%': q25, '50%': q50, '75%': q75, 'max': high}
+    return pd.DataFrame(rows)
+
+def figure_html(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return f'<img src="data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode("ascii")}">'
+
+# Static HTML report with the same tables and charts as the interactive EDA
+def write_report(partial, path, source):
+    sections = [f'<h1>Customer Feedback EDA</h1><p>{source}: {partial["rows"]:,} rows, {len(partial["non_null"])} columns</p>']
+    info = pd.DataFrame({'Non-Null Count': partial['non_null'].astype('int64'),
+                         'Missing': partial['rows'] - partial['non_null'].astype('int64')})
+    sections.append('<h2>Columns</h2>' + info.to_html())
+    sections.append('<h2>First rows</h2>' + partial['head'].to_html(index=False))
+    sections.append('<h2>Summary statistics</h2>' + describe_partial(partial).to_html(float_format='%.3f'))
+    for column in CATEGORICAL_COLUMNS:
+        counts = partial['value_counts'][column].astype('int64').sort_values(ascending=False)
+        sections.append(f'<h2>Unique values in {column}</h2>' + counts.to_frame('count').to_html())
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ratings = partial['histograms']['Customer Rating (1-5)'].sort_index()
+    sns.barplot(x=ratings.index.astype(int), y=ratings.to_numpy(), ax=ax)
+    ax.set_title('Distribution of Customer Ratings')
+    sections.append(figure_html(fig))
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    grid = partial['resolution_ratings'].unstack(fill_value=0).T.sort_index(ascending=False)
+    sns.heatmap(grid, cmap='Blues', ax=ax, cbar_kws={'label': 'tickets'})
+    ax.set_xlabel(f'Resolution Time (hours, {RESOLUTION_BIN_HOURS} h bins)')
+    ax.set_ylabel('Customer Rating (1-5)')
+    ax.set_title('Resolution Time vs Customer Rating')
+    sections.append(figure_html(fig))
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    service = partial['service_ratings']
+    (service['sum'] / service['count']).sort_values().plot(kind='bar', ax=ax)
+    ax.set_title('Average Customer Rating by Service Type')
+    ax.set_ylabel('Average Customer Rating')
+    ax.tick_params(axis='x', rotation=45)
+    sections.append(figure_html(fig))
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sentiments = partial['value_counts']['Sentiment']
+    sns.barplot(x=sentiments.index.astype(str), y=sentiments.to_numpy(), ax=ax)
+    ax.set_title('Distribution of Sentiments')
+    sections.append(figure_html(fig))
+
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('<html><head><meta charset="utf-8"><title>Customer Feedback EDA</title></head><body>'
+                   + '\n'.join(sections) + '</body></html>')
+
+def streaming_eda(path, report, workers=None, block_bytes=32 * 1024 ** 2, chunksize=50000):
+    tasks = [(path, start, end, chunksize) for start, end in byte_ranges(path, block_bytes)]
+    merged = None
+    with Pool(workers) as pool:
+        # Ranges are merged in file order so 'head' comes from the first range
+        for _, partial in pool.imap(scan_range, tasks):
+            if partial is not None:
+                merged = merge_partials(merged, partial)
+    write_report(merged, report, os.path.basename(path))
+    return merged
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exploratory analysis of the customer feedback export")
+    parser.add_argument('path', nargs='?', default=DATA_FILE)
+    parser.add_argument('--stream', action='store_true', help="chunked, multi-process pass writing a static report")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--block-mb', type=int, default=32, help="bytes of the file per worker task")
+    parser.add_argument('--chunksize', type=int, default=50000, help="rows parsed at a time within a task")
+    parser.add_argument('--report', default='eda-report.html')
+    args = parser.parse_args()
+    if args.stream:
+        plt.switch_backend('Agg')
+        merged = streaming_eda(args.path, args.report, args.workers, args.block_mb * 1024 ** 2, args.chunksize)
+        print(f"Wrote {args.report} ({merged['rows']:,} rows)")
+    else:
+        interactive_eda(args.path)
\ No newline at end of file
@@ -1,64 +1,203 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics import accuracy_score, classification_report
+import tempfile
+from feedback_data import CUBE_DIMENSIONS, RATINGS, TEXT_COLUMNS, cube_slice, load_cube, load_feedback
+from feedback_search import FILTER_COLUMNS, load_index, timed_search
+from feedback_dedup import DEDUP_COLUMNS, DEDUP_THRESHOLD, MinHashSignatures, NearDuplicates, dedup_training_report, ticket_text
+from feedback_model import PredictionCache, fold_in, load_or_train, model_configs, score_csv
 
-# Load and preprocess data
-@st.cache_data
+# Load and preprocess data. Held once per server as a shared resource rather than copied into
+# every session by cache_data; callers must treat the frame as read-only.
+@st.cache_resource
 def load_data():
-    # Load your data here
-    df = pd.read_csv('synthetic_it_service_provider_data.csv')
-    # Preprocess data
+    # Typed columns (categoricals, parsed Request Date, nullable Int8 rating), memory-mapped
+    # from the Feather cache when the CSV has not changed since it was written
+    df = load_feedback('synthetic_it_service_provider_data.csv')
     return df
 
 df = load_data()
 
-# Train sentiment analysis model
+# Sentiment analysis model, loaded from the versioned artifact on disk and only retrained
+# when the data or the training config changed (see feedback_model.py). With a dedup threshold
+# the model is trained on one ticket per near-duplicate cluster.
 @st.cache_resource
-def train_model(df):
-    X = df['Customer Feedback']
-    y = df['Sentiment']
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    vectorizer = TfidfVectorizer()
-    X_train_vectorized = vectorizer.fit_transform(X_train)
-    X_test_vectorized = vectorizer.transform(X_test)
-    
-    model = RandomForestClassifier()
-    model.fit(X_train_vectorized, y_train)
-    
-    return model, vectorizer
-
-model, vectorizer = train_model(df)
+def get_model(engine='RandomForest (TF-IDF)', dedup_threshold=None, data_path='synthetic_it_service_provider_data.csv'):
+    config = model_configs(data_path)[engine]
+    if dedup_threshold is not None:
+        config = {**config, 'dedup_threshold': dedup_threshold}
+    artifact = load_or_train(data_path, config)
+    # The artifact rather than its model: folding rows in swaps artifact['model']
+    return artifact
+
+# Predictions shared by all sessions, keyed on normalized text and model version
+@st.cache_resource
+def get_prediction_cache(maxsize=10000):
+    return PredictionCache(maxsize)
 
 # Streamlit app
 st.title('Customer Feedback Analysis')
 
+# Training engine, with its held-out accuracy, training time and peak memory
+st.sidebar.header('Sentiment Model')
+# A model promoted by bench-feedback-model.py --promote is listed first and served by default
+engine = st.sidebar.selectbox('Training engine:', list(model_configs('synthetic_it_service_provider_data.csv')))
+model_dedup = None
+if model_configs('synthetic_it_service_provider_data.csv')[engine]['engine'] == 'tfidf':
+    if st.sidebar.toggle(f'Collapse near-duplicates before training (similarity {DEDUP_THRESHOLD})'):
+        model_dedup = DEDUP_THRESHOLD
+if st.sidebar.button('Load model and show training report'):
+    artifact = get_model(engine, model_dedup)
+    metrics = artifact['metrics']
+    st.sidebar.write(f"Version {artifact['version']}: accuracy {metrics['accuracy']:.3f} on the held-out split, "
+                     f"trained on {metrics['train_rows']:,} rows in {metrics['train_s']:.1f} s "
+                     f"with {metrics['peak_mb']:.0f} MB peak memory")
+if model_configs('synthetic_it_service_provider_data.csv')[engine]['engine'] == 'sgd_hashing':
+    # Incremental engine: newly labelled tickets are folded in without a full refit
+    labelled = st.sidebar.file_uploader('Fold in labelled feedback (CSV):', type='csv')
+    if labelled is not None and st.sidebar.button('Fold in'):
+        artifact = get_model(engine, model_dedup)
+        try:
+            rows = fold_in(artifact, pd.read_csv(labelled), 'synthetic_it_service_provider_data.csv')
+            st.sidebar.write(f"Folded in {rows:,} rows; model is now version {artifact['version']}, "
+                             f"held-out accuracy {artifact['metrics']['accuracy']:.3f} "
+                             f"on {artifact['metrics']['accuracy_rows']:,} rows")
+        except ValueError as e:
+            st.sidebar.error(str(e))
+
 # Input for new feedback
 new_feedback = st.text_area('Enter customer feedback:')
 if new_feedback:
-    # Predict sentiment
-    new_feedback_vectorized = vectorizer.transform([new_feedback])
-    sentiment = model.predict(new_feedback_vectorized)[0]
+    # Predict sentiment; the model is only loaded once the first prediction is requested
+    artifact = get_model(engine, model_dedup)
+    sentiment, probabilities = get_prediction_cache().predict(artifact, new_feedback)
     st.write(f'Predicted Sentiment: {sentiment}')
+    st.bar_chart(pd.Series(probabilities, name='Probability'), horizontal=True)
+    st.caption(f"Model {artifact['version']}, trained {artifact['trained_at']}, "
+               f"held-out accuracy {artifact['metrics']['accuracy']:.3f}")
+
+stats = get_prediction_cache().stats()
+st.sidebar.caption(f"Prediction cache: {stats['entries']:,}/{stats['maxsize']:,} entries, "
+                   f"hit rate {stats['hit_rate']:.0%} ({stats['hits']:,} hits, {stats['misses']:,} misses)")
+
+# Batch scoring of an uploaded export shaped like synthetic_it_service_provider_data-test.csv.
+# Streamlit keeps both the upload and the download payload in server memory, so a scoring run
+# holds about twice the file size per session; uploads are capped to bound that.
+SCORING_MAX_UPLOAD_MB = 50
+st.subheader('Batch Scoring')
+uploaded = st.file_uploader(f'Upload a feedback CSV to score (up to {SCORING_MAX_UPLOAD_MB} MB):', type='csv',
+                            max_upload_size=SCORING_MAX_UPLOAD_MB)
+chunksize = st.number_input('Rows per chunk', min_value=100, max_value=100000, value=5000, step=100)
+if uploaded is not None and st.button('Score file'):
+    artifact = get_model(engine, model_dedup)
+    progress_bar = st.progress(0.0, text='Scoring...')
+    report = lambda fraction, rows: progress_bar.progress(fraction or 0.0, text=f'Scored {rows:,} rows')
+    # Scored chunks go to a temporary file on disk rather than accumulating as frames; only the
+    # finished CSV is read back for the download
+    with tempfile.TemporaryFile() as scored:
+        stats = score_csv(uploaded, artifact, scored, chunksize=chunksize, progress=report, total_bytes=uploaded.size)
+        progress_bar.progress(1.0, text=f'Scored {stats["rows"]:,} rows')
+        st.write(f'Scored {stats["rows"]:,} rows in {stats["seconds"]:.2f} s ({stats["rows_per_s"]:,.0f} rows/s)')
+        scored.seek(0)
+        st.download_button('Download scored file', scored.read(), file_name=f'scored-{uploaded.name}', mime='text/csv')
+
+# Full-text search over the ticket text columns, ranked with BM25 (see feedback_search.py)
+@st.cache_resource
+def get_search_index(data_path='synthetic_it_service_provider_data.csv'):
+    return load_index(data_path)
 
-# Data overview
+st.subheader('Search Tickets')
+query = st.text_input('Search issue descriptions, feedback, complaints, compliments, comments and expectations:')
+if query:
+    search_filters = dict(zip(FILTER_COLUMNS, st.columns(len(FILTER_COLUMNS))))
+    search_filters = {column: cell.multiselect(column, list(df[column].cat.categories), key=f'search {column}')
+                      for column, cell in search_filters.items()}
+    page_size = 20
+    page = st.number_input('Page', min_value=1, value=1, step=1) - 1
+    total, rows, scores, ms = timed_search(get_search_index(), query, search_filters, page, page_size)
+    st.write(f'{total:,} matching tickets ({ms:.2f} ms), showing {page * page_size + 1 if total else 0}-'
+             f'{min((page + 1) * page_size, total)}')
+    results = df.iloc[rows].assign(Score=scores.round(3))
+    st.dataframe(results[['Score', 'Request ID', 'Service Type', 'Status', 'Sentiment'] + TEXT_COLUMNS], hide_index=True)
+
+# Near-duplicate clusters over Issue Description and Customer Feedback (see feedback_dedup.py).
+# Signatures are computed once per data file; clusters are derived from them per threshold and
+# only the last few thresholds are kept.
+@st.cache_resource(max_entries=1)
+def get_minhash_signatures(data_path='synthetic_it_service_provider_data.csv'):
+    return MinHashSignatures(ticket_text(load_data()))
+
+@st.cache_resource(max_entries=4)
+def get_near_duplicates(threshold, data_path='synthetic_it_service_provider_data.csv'):
+    return NearDuplicates(get_minhash_signatures(data_path), threshold)
+
+st.sidebar.header('Near-Duplicates')
+dedup_threshold = st.sidebar.slider('Similarity threshold', min_value=0.1, max_value=1.0, value=DEDUP_THRESHOLD,
+                                    step=0.05)
+near_duplicates = get_near_duplicates(dedup_threshold)
+cluster_sizes = pd.Series(near_duplicates.clusters).value_counts()
+st.sidebar.caption(f"{len(cluster_sizes):,} clusters; {int(cluster_sizes[cluster_sizes > 1].sum()):,} tickets have "
+                   f"a near-duplicate (LSH {near_duplicates.bands} bands x {near_duplicates.rows} rows)")
+
+st.subheader('Similar Tickets')
+request_id = st.text_input('Request ID to find similar tickets for:')
+if request_id:
+    matches = np.flatnonzero(df['Request ID'] == request_id.strip())
+    if not len(matches):
+        st.write('No ticket with that Request ID.')
+    else:
+        rows, similarity = near_duplicates.similar(matches[0], limit=20)
+        st.write(f'{len(rows)} candidate tickets share an LSH bucket with it')
+        similar = df.iloc[rows][['Request ID'] + DEDUP_COLUMNS]
+        similar.insert(0, 'Similarity', similarity)
+        similar.insert(2, 'Duplicate Cluster', near_duplicates.clusters[rows])
+        st.dataframe(similar, hide_index=True)
+if st.button('Compare training with and without near-duplicates'):
+    st.dataframe(dedup_training_report(df, near_duplicates.clusters), hide_index=True)
+
+# Data overview, with each ticket's near-duplicate cluster; only the rows shown are copied
 st.subheader('Data Overview')
-st.write(df.head())
+overview = df.head()
+overview.insert(len(overview.columns), 'Duplicate Cluster', near_duplicates.clusters[:len(overview)])
+st.write(overview)
+
+# Aggregate cube, rebuilt only when the data file changes (see feedback_data.py)
+@st.cache_data
+def get_cube(data_path='synthetic_it_service_provider_data.csv'):
+    return load_cube(data_path)
+
+cube = get_cube()
+
+# Filters are applied to cube cells, so the charts below never scan the tickets
+st.sidebar.header('Dashboard Filters')
+filters = {column: st.sidebar.multiselect(f'{column}:', list(cube[column].cat.categories)) for column in CUBE_DIMENSIONS}
+months = sorted(cube['Month'].unique())
+if len(months) > 1:
+    filters['Month'] = st.sidebar.select_slider('Request month:', options=months, value=(months[0], months[-1]),
+                                                format_func=lambda month: month.strftime('%b %Y'))
+group_by = st.sidebar.selectbox('Average rating by:', CUBE_DIMENSIONS + ['Month'])
+overall = cube_slice(cube, filters)
 
 # Visualizations
 st.subheader('Customer Rating Distribution')
+st.write(f"{int(overall['Tickets'].iloc[0]):,} tickets match the filters")
 fig, ax = plt.subplots()
-sns.countplot(x='Customer Rating (1-5)', data=df, ax=ax)
+histogram = overall[[f'Rating {r}' for r in RATINGS]].iloc[0]
+sns.barplot(x=RATINGS, y=histogram.to_numpy(), ax=ax)
+ax.set_xlabel('Customer Rating (1-5)')
+ax.set_ylabel('count')
 st.pyplot(fig)
 
-st.subheader('Average Customer Rating by Service Type')
+st.subheader(f'Average Customer Rating by {group_by}')
 fig, ax = plt.subplots(figsize=(10, 6))
-df.groupby('Service Type')['Customer Rating (1-5)'].mean().sort_values().plot(kind='bar', ax=ax)
+averages = cube_slice(cube, filters, by=[group_by])['Average Rating']
+if group_by == 'Month':
+    averages.index = averages.index.strftime('%b %Y')
+else:
+    averages = averages.sort_values()
+averages.plot(kind='bar', ax=ax)
 plt.ylabel('Average Customer Rating')
 plt.xticks(rotation=45)
 st.pyplot(fig)
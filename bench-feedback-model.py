@@ -0,0 +1,51 @@
+import argparse
+import json
+import time
+import pandas as pd
+import feedback_model
+
+# Model-selection benchmark for the sentiment pipeline in Customer-Feedback-App.py. Every
+# candidate (TF-IDF setting x estimator setting) is cross-validated on the training split across
+# all cores, reusing cached TF-IDF matrices, and reported with fit time, peak fit memory,
+# predict latency and throughput from raw text, model size and accuracy. --promote makes the best candidate the model
+# the app serves.
+
+def print_table(title, df):
+    print(f'\n== {title} ==')
+    with pd.option_context('display.max_colwidth', 80, 'display.width', 250):
+        print(df.to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated model selection for the sentiment model")
+    parser.add_argument('--data', default=feedback_model.DATA_FILE)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--estimators', nargs='+', choices=list(feedback_model.ESTIMATORS),
+                        help="only these estimators (default: all)")
+    parser.add_argument('--promote', action='store_true', help="serve the best candidate in the app")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    candidates = [config for config in feedback_model.candidate_configs()
+                  if not args.estimators or config['estimator'] in args.estimators]
+    start = time.perf_counter()
+    scores = feedback_model.select_models(args.data, candidates, folds=args.folds, n_jobs=args.n_jobs)
+    elapsed = time.perf_counter() - start
+    columns = {'candidate': 'candidate', 'accuracy': 'cv accuracy', 'accuracy_std': '+/-', 'fit_s': 'fit s',
+               'predict_ms': 'text->label ms (1 row)', 'rows_per_s': 'text rows/s', 'peak_mb': 'peak fit MB',
+               'size_mb': 'model MB'}
+    print_table(f'{len(candidates)} candidates, {args.folds}-fold CV on the training split ({elapsed:.1f} s)',
+                scores[list(columns)].rename(columns=columns))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(scores.to_dict(orient='records'), file, indent=2)
+
+    if args.promote:
+        best = scores.iloc[0]
+        record = feedback_model.promote(best['config'], args.data, cv_accuracy=float(best['accuracy']))
+        print(f"\nPromoted {record['name']} (version {record['version']}, "
+              f"held-out accuracy {record['held_out_accuracy']:.4f})")
+
+if __name__ == "__main__":
+    main()
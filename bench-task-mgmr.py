@@ -0,0 +1,232 @@
+import argparse
+import io
+import json
+import logging
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import matplotlib
+matplotlib.use('Agg')
+from task_alerts import AlertEngine
+from task_backend import FakeBackend
+from task_charts import metrics_figure_png
+from task_metrics import ALL_METRICS, DOWNSAMPLERS, MetricsCollector, MetricsHistory, visible_metrics
+from task_processes import DEFAULT_FILTER_PARAMS, PROCESS_CLASSIFICATIONS, TOP_N_METRICS, ProcessTable, process_info_view
+
+# Benchmarks for 2-sim-task-mgmr.py and its task_*.py modules. Process and metric collection
+# run against the deterministic FakeBackend driven by a manual clock, so the suite runs offline
+# on any Linux box and gives the same data on every run. Use --json to save results for
+# comparing runs; test_task_manager.py checks that the code timed here gives correct results.
+
+# Time fn over a few repeats and return the best run in milliseconds
+def best_of(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+# Arrow IPC payload, the format Streamlit uses to ship chart data to the browser
+def arrow_payload(df):
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(df)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def print_table(title, rows):
+    print(f'\n== {title} ==')
+    if rows:
+        print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+
+# Clock the fake backend and process table read; advanced by hand between refreshes
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+# Process table and metrics collector over a fake host with n processes, already refreshed
+# twice so the table is in its steady state (handles cached, rates available)
+def fake_host(n, churn_per_s, seed=0):
+    clock = ManualClock()
+    backend = FakeBackend(n_processes=n, churn_per_s=churn_per_s, seed=seed, clock=clock)
+    # Only explicit refresh() calls rescan; metric samples reuse the current frame
+    table = ProcessTable(backend=backend, min_interval_s=float('inf'), clock=clock)
+    collector = MetricsCollector(backend=backend, process_table=table)
+    for _ in range(2):
+        clock.advance(1.0)
+        table.refresh()
+    return clock, table, collector
+
+# Steady-state cost of one process table refresh and one full metrics sample
+def bench_collection(process_counts, churn_per_s, repeats):
+    rows = []
+    for n in process_counts:
+        clock, table, collector = fake_host(n, churn_per_s)
+
+        def refresh():
+            clock.advance(1.0)
+            table.refresh()
+
+        refresh_ms = best_of(refresh, repeats)
+        sample_ms = best_of(lambda: collector.sample(ALL_METRICS), repeats)
+        rows.append({'processes': n, 'churn/s': churn_per_s, 'table refresh ms': refresh_ms,
+                     'metrics sample ms': sample_ms})
+    return rows
+
+# Every process classification and the top-N panels over the cached snapshot
+def bench_filtering(process_counts, top_n, repeats):
+    rows = []
+    params = {**DEFAULT_FILTER_PARAMS, 'top_k': top_n}
+    for n in process_counts:
+        _, table, _ = fake_host(n, churn_per_s=0.01)
+        frame = table.frame()
+        for name, select in PROCESS_CLASSIFICATIONS.items():
+            ms = best_of(lambda: select(frame, params), repeats)
+            rows.append({'processes': n, 'selection': name, 'ms': ms, 'rows': len(select(frame, params))})
+        view_ms = best_of(lambda: [process_info_view(frame).nlargest(top_n, m) for m in TOP_N_METRICS], repeats)
+        rows.append({'processes': n, 'selection': f'top-{top_n} panels', 'ms': view_ms,
+                     'rows': top_n * len(TOP_N_METRICS)})
+    return rows
+
+# History filled with a deterministic random walk for every metric
+def synthetic_history(length, seed=0):
+    rng = np.random.default_rng(seed)
+    history = MetricsHistory(ALL_METRICS, retention_s=length, resolution_s=1)
+    values = np.cumsum(rng.normal(size=(length, len(ALL_METRICS))), axis=0)
+    start_ms = 1_700_000_000_000
+    for i, row in enumerate(values):
+        history._append_row(start_ms + i * 1000, row)
+    return history
+
+# Cost of one append into a full ring buffer and of taking the whole window as a frame
+def bench_history(lengths, repeats):
+    rows = []
+    sample = {metric: 1.0 for metric in ALL_METRICS}
+    for length in lengths:
+        history = synthetic_history(length)
+        next_ms = [history.last_timestamp_ms]
+
+        def append_1000():
+            for _ in range(1000):
+                next_ms[0] += 1000
+                history.append(sample, next_ms[0])
+
+        rows.append({'history rows': length,
+                     'append us': best_of(append_1000, repeats),  # ms per 1000 appends == us per append
+                     'to_frame ms': best_of(history.to_frame, repeats),
+                     'buffer MB': (history._values.nbytes + history._times.nbytes) / 1024 ** 2})
+    return rows
+
+# Render cost of one refresh for each backend, across history lengths and metric counts. The
+# native backend's cost is building the downsampled visible window and its per-chart payloads.
+def bench_rendering(lengths, metric_counts, width_px, repeats):
+    rows = []
+    for length in lengths:
+        history = synthetic_history(length)
+        for count in metric_counts:
+            metrics = ALL_METRICS[:count]
+            png = metrics_figure_png(history.to_frame(), metrics)
+            mpl_ms = best_of(lambda: metrics_figure_png(history.to_frame(), metrics), repeats)
+
+            def native_payloads():
+                frame = visible_metrics(history, metrics, None, width_px).set_index('Time')
+                return [arrow_payload(frame[[m]].dropna()) for m in metrics]
+
+            native_ms = best_of(native_payloads, repeats)
+            native_bytes = sum(len(payload) for payload in native_payloads())
+            rows.append({'history': length, 'metrics': count, 'matplotlib ms': mpl_ms, 'png KB': len(png) / 1024,
+                         'native ms': native_ms, 'native KB': native_bytes / 1024})
+    return rows
+
+# Downsampling cost and resulting chart payload for the visible window
+def bench_downsampling(lengths, width_px, repeats):
+    rows = []
+    for length in lengths:
+        history = synthetic_history(length)
+        for method in DOWNSAMPLERS:
+            ms = best_of(lambda: visible_metrics(history, ALL_METRICS, None, width_px, method), repeats)
+            df = visible_metrics(history, ALL_METRICS, None, width_px, method).set_index('Time')
+            # Each chart only receives the points its own metric kept
+            series = [df[[m]].dropna() for m in ALL_METRICS]
+            rows.append({'history': length, 'method': method, 'ms': ms,
+                         'points/chart': sum(len(s) for s in series) // len(series),
+                         'payload KB': sum(len(arrow_payload(s)) for s in series) / 1024})
+    return rows
+
+# Cost of evaluating a rule set on one new sample: sustained-threshold rules plus rate rules
+# over windows of 1 to 5 minutes, with the engine's history already full
+def bench_alerts(rule_counts, repeats):
+    rows = []
+    rng = np.random.default_rng(0)
+    for count in rule_counts:
+        rules = [f'{ALL_METRICS[i % len(ALL_METRICS)]} > {50 + i % 40} for {10 + i % 50}s' for i in range(count * 3 // 4)]
+        rules += [f'{ALL_METRICS[i % len(ALL_METRICS)]} rising {1 + i % 5}%/min over {1 + i % 5}m'
+                  for i in range(count - len(rules))]
+        engine = AlertEngine(rules=rules, log_path=None)
+        next_ms = [1_700_000_000_000]
+        samples = [{m: float(v) for m, v in zip(ALL_METRICS, row)} for row in rng.uniform(0, 100, (1000, len(ALL_METRICS)))]
+        for sample in samples[:400]:
+            next_ms[0] += 1000
+            engine.observe(sample, next_ms[0])
+
+        def observe_100():
+            for sample in samples[400:500]:
+                next_ms[0] += 1000
+                engine.observe(sample, next_ms[0])
+
+        rows.append({'rules': len(engine.rules), 'observe ms': best_of(observe_100, repeats) / 100})
+    return rows
+
+SUITES = ['collection', 'filtering', 'history', 'rendering', 'downsampling', 'alerts']
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the simulated task manager")
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=SUITES)
+    parser.add_argument('--processes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--churn', type=float, default=0.01, help="fraction of processes replaced per second")
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--history', type=int, nargs='+', default=[3600, 86400, 30 * 8640],
+                        help="history lengths in rows for the history and downsampling suites")
+    parser.add_argument('--lengths', type=int, nargs='+', default=[60, 3600, 21600],
+                        help="history lengths in rows for the rendering suite")
+    parser.add_argument('--metrics', type=int, nargs='+', default=[1, 5, 10, 23])
+    parser.add_argument('--width', type=int, default=600)
+    parser.add_argument('--rules', type=int, nargs='+', default=[10, 100, 300], help="rule counts for the alerts suite")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', help="write all results to this file")
+    args = parser.parse_args()
+    # Alerts fired by the alerts suite would otherwise be printed between the tables
+    logging.basicConfig(level=logging.ERROR)
+
+    runs = {
+        'collection': (f'Collection (fake backend, churn {args.churn}/s)',
+                       lambda: bench_collection(args.processes, args.churn, args.repeats)),
+        'filtering': ('Filtering and top-N over the cached snapshot',
+                      lambda: bench_filtering(args.processes, args.top_n, args.repeats)),
+        'history': ('History append and window', lambda: bench_history(args.history, args.repeats)),
+        'rendering': ('Chart rendering: one refresh',
+                      lambda: bench_rendering(args.lengths, args.metrics, args.width, args.repeats)),
+        'downsampling': (f'Downsampling to {args.width} px, all metrics',
+                         lambda: bench_downsampling(args.history, args.width, args.repeats)),
+        'alerts': ('Alert rule evaluation per sample', lambda: bench_alerts(args.rules, args.repeats)),
+    }
+    results = {}
+    for suite in args.suites:
+        title, run = runs[suite]
+        results[suite] = run()
+        print_table(title, results[suite])
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main()
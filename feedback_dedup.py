@@ -0,0 +1,136 @@
+import time
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+# Near-duplicate ticket clustering for Customer-Feedback-App.py. Each ticket's text is reduced
+# to a set of word shingles and a MinHash signature; locality-sensitive hashing over bands of
+# the signature finds candidate pairs without comparing every pair of tickets, and candidates
+# whose estimated Jaccard similarity clears the threshold are joined into clusters.
+
+DEDUP_COLUMNS = ['Issue Description', 'Customer Feedback']
+NUM_PERM = 128
+DEDUP_THRESHOLD = 0.8
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Bands x rows per band for NUM_PERM permutations whose LSH threshold, (1/bands)^(1/rows),
+# is closest to the requested similarity
+def lsh_bands(threshold, num_perm=NUM_PERM):
+    shapes = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(shapes, key=lambda shape: abs((1 / shape[0]) ** (1 / shape[1]) - threshold))
+
+# MinHash signatures of each ticket's shingle set, one row per text. They do not depend on the
+# similarity threshold, so one set serves every NearDuplicates built over the same data.
+class MinHashSignatures:
+    def __init__(self, texts, num_perm=NUM_PERM, shingle_size=1, seed=1, block_rows=2048):
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._vectorizer = HashingVectorizer(n_features=MERSENNE_PRIME, ngram_range=(shingle_size, shingle_size),
+                                             alternate_sign=False, norm=None, binary=True)
+        self.values = self.minhash(texts, block_rows)
+        self.empty = (self.values == MERSENNE_PRIME).all(axis=1)
+
+    # The permutation h(x) = (a*x + b) mod p is applied to every shingle of a block of texts at
+    # once and reduced per text
+    def minhash(self, texts, block_rows=2048):
+        texts = pd.Series(texts).fillna('').astype(str)
+        signatures = np.full((len(texts), len(self._a)), MERSENNE_PRIME, dtype=np.uint32)
+        for start in range(0, len(texts), block_rows):
+            shingles = self._vectorizer.transform(texts.iloc[start:start + block_rows])
+            lengths = np.diff(shingles.indptr)
+            rows = np.flatnonzero(lengths)
+            if not len(rows):
+                continue
+            hashed = (shingles.indices.astype(np.uint64)[:, None] * self._a + self._b) % MERSENNE_PRIME
+            signatures[start + rows] = np.minimum.reduceat(hashed, shingles.indptr[rows], axis=0)
+        return signatures
+
+# LSH buckets and clusters over precomputed signatures for one similarity threshold
+class NearDuplicates:
+    def __init__(self, signatures, threshold=DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.signatures, self.empty = signatures.values, signatures.empty
+        self.bands, self.rows = lsh_bands(threshold, self.signatures.shape[1])
+        self._build_buckets()
+        self.clusters = self._cluster()
+
+    # Bucket id of every ticket in every band; identical band slices share an id
+    def _build_buckets(self):
+        bands = self.signatures[:, :self.bands * self.rows].reshape(len(self.signatures), self.bands, self.rows)
+        self.buckets = np.empty((len(self.signatures), self.bands), dtype=np.int64)
+        for band in range(self.bands):
+            keys = np.ascontiguousarray(bands[:, band]).view(np.dtype((np.void, 4 * self.rows))).ravel()
+            self.buckets[:, band] = np.unique(keys, return_inverse=True)[1]
+        self.buckets[self.empty] = -1 - np.arange(self.empty.sum())[:, None]
+        self._order = np.argsort(self.buckets, axis=0, kind='stable')
+        self._sorted = np.take_along_axis(self.buckets, self._order, axis=0)
+
+    # Each ticket is linked to the first ticket of each of its buckets when their signatures
+    # agree on at least `threshold` of the permutations; clusters are the connected components
+    def _cluster(self):
+        n = len(self.signatures)
+        sources, targets = [], []
+        for band in range(self.bands):
+            first = np.unique(self.buckets[:, band], return_index=True)[1]
+            heads = first[np.searchsorted(self.buckets[first, band], self.buckets[:, band])]
+            candidates = np.flatnonzero(heads != np.arange(n))
+            similar = self.similarity(candidates, heads[candidates]) >= self.threshold
+            sources.append(candidates[similar])
+            targets.append(heads[candidates][similar])
+        sources, targets = np.concatenate(sources), np.concatenate(targets)
+        graph = coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n, n))
+        return connected_components(graph, directed=False)[1]
+
+    # Estimated Jaccard similarity of ticket pairs from their signatures
+    def similarity(self, left, right):
+        return (self.signatures[left] == self.signatures[right]).mean(axis=1)
+
+    # Tickets sharing a bucket with `row` in any band, with estimated similarity, most similar
+    # first; only the matching bucket ranges of each band are read
+    def similar(self, row, limit=10, min_similarity=0.0):
+        candidates = []
+        for band in range(self.bands):
+            low, high = np.searchsorted(self._sorted[:, band], self.buckets[row, band], side='left'), \
+                        np.searchsorted(self._sorted[:, band], self.buckets[row, band], side='right')
+            candidates.append(self._order[low:high, band])
+        candidates = np.setdiff1d(np.concatenate(candidates), [row])
+        scores = self.similarity(candidates, np.full(len(candidates), row))
+        keep = scores >= min_similarity
+        order = np.argsort(-scores[keep], kind='stable')[:limit]
+        return candidates[keep][order], scores[keep][order]
+
+def ticket_text(df, columns=DEDUP_COLUMNS):
+    text = [df[column].fillna('').astype(str) for column in columns]
+    return text[0].str.cat(text[1:], sep=' ')
+
+# Training rows with near-duplicates collapsed: one ticket per cluster is kept, and training
+# tickets whose cluster also appears in the held-out rows are dropped so duplicates cannot leak
+# into the score
+def collapse_near_duplicates(clusters, train_rows, test_rows):
+    repeat_in_cluster = pd.Series(clusters[train_rows]).duplicated().to_numpy()
+    leaked = np.isin(clusters[train_rows], clusters[test_rows])
+    return train_rows[~repeat_in_cluster & ~leaked]
+
+# Training on the held-out split's complement with and without near-duplicates
+def dedup_training_report(df, clusters, text_column='Customer Feedback', label_column='Sentiment',
+                          test_size=0.2, random_state=42):
+    train_rows, test_rows = train_test_split(np.arange(len(df)), test_size=test_size, random_state=random_state)
+    variants = {'All tickets': train_rows,
+                'Near-duplicates collapsed': collapse_near_duplicates(clusters, train_rows, test_rows)}
+    X, y = df[text_column], df[label_column].astype(str)
+    report = []
+    for name, rows in variants.items():
+        start = time.perf_counter()
+        vectorizer = TfidfVectorizer()
+        model = RandomForestClassifier(n_estimators=100, random_state=random_state, n_jobs=-1)
+        model.fit(vectorizer.fit_transform(X.iloc[rows]), y.iloc[rows])
+        fit_s = time.perf_counter() - start
+        accuracy = accuracy_score(y.iloc[test_rows], model.predict(vectorizer.transform(X.iloc[test_rows])))
+        report.append({'Training set': name, 'Rows': len(rows), 'Fit time (s)': fit_s, 'Held-out accuracy': accuracy})
+    return pd.DataFrame(report)
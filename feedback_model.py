@@ -0,0 +1,474 @@
+import copy
+import ctypes
+import gc
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import ComplementNB
+from sklearn.metrics import accuracy_score
+from feedback_data import DATA_FILE, file_hash, load_feedback
+from feedback_dedup import MinHashSignatures, NearDuplicates, collapse_near_duplicates, ticket_text
+
+# Sentiment model artifacts for Customer-Feedback-App.py. A fitted vectorizer and classifier
+# are saved with joblib under .feedback_models/ next to the data, named by a version key made
+# from the training data's hash, the training config and the scikit-learn version. Starting
+# the app loads the matching artifact; training only happens when no artifact matches.
+# A TF-IDF config with 'dedup_threshold' set trains on one ticket per near-duplicate cluster
+# (see feedback_dedup.py); it is a different config, so it gets its own artifact.
+
+MODEL_DIR = '.feedback_models'
+# Bump when the artifact layout changes
+ARTIFACT_FORMAT = 2
+
+DEFAULT_CONFIG = {
+    'engine': 'tfidf',
+    'estimator': 'random_forest',
+    'text_column': 'Customer Feedback',
+    'label_column': 'Sentiment',
+    'test_size': 0.2,
+    'random_state': 42,
+    'vectorizer': {},
+    'classifier': {'n_estimators': 100, 'random_state': 42},
+}
+
+# Out-of-core alternative: a stateless hashing vectorizer and a linear model updated with
+# partial_fit over CSV chunks, so training memory is bounded by the chunk size
+SGD_CONFIG = {
+    'engine': 'sgd_hashing',
+    'text_column': 'Customer Feedback',
+    'label_column': 'Sentiment',
+    'test_size': 0.2,
+    'random_state': 42,
+    'chunksize': 10000,
+    'epochs': 5,
+    'vectorizer': {'n_features': 2 ** 20, 'alternate_sign': False},
+    'classifier': {'loss': 'log_loss', 'alpha': 1e-5, 'random_state': 42},
+}
+
+# Classifiers the in-memory TF-IDF engine can fit; all provide predict_proba
+ESTIMATORS = {
+    'random_forest': RandomForestClassifier,
+    'logistic_regression': LogisticRegression,
+    'naive_bayes': ComplementNB,
+    'sgd': SGDClassifier,
+}
+
+# Training configurations selectable in the app
+MODEL_CONFIGS = {
+    'RandomForest (TF-IDF)': DEFAULT_CONFIG,
+    'SGD (hashing, out-of-core)': SGD_CONFIG,
+}
+
+def model_dir(data_path):
+    return os.path.join(os.path.dirname(os.path.abspath(data_path)), MODEL_DIR)
+
+# Version of the artifact trained from data with this hash under this config
+def model_version(data_digest, config):
+    key = json.dumps({'data': data_digest, 'config': config, 'sklearn': sklearn.__version__,
+                      'format': ARTIFACT_FORMAT}, sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+def artifact_path(data_path, version):
+    return os.path.join(model_dir(data_path), f'sentiment-{version}.joblib')
+
+# Config values are stored as JSON, so tuple-valued vectorizer settings come back as lists
+def vectorizer_params(config):
+    return {key: tuple(value) if isinstance(value, list) else value for key, value in config['vectorizer'].items()}
+
+# Fit the vectorizer and classifier on the training split and score the held-out split
+def train_tfidf(data_path, config):
+    df = load_feedback(data_path)
+    X = df[config['text_column']]
+    y = df[config['label_column']].astype(str)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=config['test_size'],
+                                                        random_state=config['random_state'])
+    if config.get('dedup_threshold') is not None:
+        clusters = NearDuplicates(MinHashSignatures(ticket_text(df)), config['dedup_threshold']).clusters
+        train_rows = collapse_near_duplicates(clusters, df.index.get_indexer(X_train.index),
+                                              df.index.get_indexer(X_test.index))
+        X_train, y_train = X.iloc[train_rows], y.iloc[train_rows]
+    vectorizer = TfidfVectorizer(**vectorizer_params(config))
+    X_train_vectorized = vectorizer.fit_transform(X_train)
+    model = ESTIMATORS[config['estimator']](**config['classifier'])
+    model.fit(X_train_vectorized, y_train)
+    return {'model': model, 'vectorizer': vectorizer, 'metrics': {'train_rows': len(X_train)},
+            'held_out': (X_test, y_test)}
+
+# Same held-out rows as train_test_split would pick for an n-row frame, as a boolean mask over
+# row positions, so chunked training scores on exactly the split the TF-IDF engine uses
+def held_out_mask(n_rows, config):
+    _, test_positions = train_test_split(np.arange(n_rows), test_size=config['test_size'],
+                                         random_state=config['random_state'])
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[test_positions] = True
+    return mask
+
+def read_chunks(data_path, config, columns):
+    return pd.read_csv(data_path, usecols=columns, chunksize=config['chunksize'], dtype=str, keep_default_na=False)
+
+# One pass to count rows and collect the classes, then `epochs` passes of partial_fit on the
+# training rows of every chunk, then one pass scoring the held-out rows
+def train_sgd_hashing(data_path, config):
+    if config.get('dedup_threshold') is not None:
+        raise ValueError("Near-duplicates are found over the whole file; use a TF-IDF engine to collapse them")
+    text, label = config['text_column'], config['label_column']
+    n_rows, classes = 0, set()
+    for chunk in read_chunks(data_path, config, [label]):
+        n_rows += len(chunk)
+        classes.update(chunk[label].unique())
+    classes = np.array(sorted(classes))
+    test_mask = held_out_mask(n_rows, config)
+
+    vectorizer = HashingVectorizer(**config['vectorizer'])
+    model = SGDClassifier(**config['classifier'])
+    for _ in range(config['epochs']):
+        offset = 0
+        for chunk in read_chunks(data_path, config, [text, label]):
+            train_rows = ~test_mask[offset:offset + len(chunk)]
+            offset += len(chunk)
+            if train_rows.any():
+                model.partial_fit(vectorizer.transform(chunk[text][train_rows]), chunk[label][train_rows], classes=classes)
+
+    accuracy, sample = held_out_accuracy(model, vectorizer, data_path, config, test_mask)
+    return {'model': model, 'vectorizer': vectorizer, 'held_out_sample': sample,
+            'metrics': {'data_rows': n_rows, 'train_rows': int(n_rows - test_mask.sum()), 'accuracy': accuracy,
+                        'accuracy_rows': int(test_mask.sum())}}
+
+# Held-out rows kept in an incremental artifact, so a fold-in is re-scored without reading the
+# data file again. The split is random, so its first rows in file order are a random sample.
+HELD_OUT_SAMPLE_ROWS = 2000
+
+# Accuracy on the held-out rows of the data file, read chunk by chunk, and the first
+# sample_rows of those rows as (texts, labels)
+def held_out_accuracy(model, vectorizer, data_path, config, test_mask, sample_rows=HELD_OUT_SAMPLE_ROWS):
+    text, label = config['text_column'], config['label_column']
+    correct, offset, sample = 0, 0, []
+    for chunk in read_chunks(data_path, config, [text, label]):
+        test_rows = test_mask[offset:offset + len(chunk)]
+        offset += len(chunk)
+        if test_rows.any():
+            held_out = chunk[test_rows]
+            correct += (model.predict(vectorizer.transform(held_out[text])) == held_out[label]).sum()
+            sample.append(held_out.head(sample_rows - sum(len(rows) for rows in sample)))
+    sample = pd.concat(sample) if sample else pd.DataFrame(columns=[text, label])
+    return float(correct / max(test_mask.sum(), 1)), (sample[text].tolist(), sample[label].to_numpy())
+
+TRAINING_ENGINES = {
+    'tfidf': train_tfidf,
+    'sgd_hashing': train_sgd_hashing,
+}
+
+# Peak growth of the process's resident memory while the block runs, native allocations in
+# scikit-learn's compiled code included. On Linux the kernel's high-water mark (VmHWM) is reset
+# on entry and read on exit, so even a fit lasting milliseconds is measured exactly; elsewhere
+# peak_mb is NaN. Freed heap is handed back to the OS first, so a block that reuses memory left
+# over from an earlier task still shows its own footprint. The mark is per process, so only one
+# block per process should be measured at a time (joblib workers run one task at a time).
+class PeakMemory:
+    def __enter__(self):
+        self.peak_mb = np.nan
+        gc.collect()
+        if _libc is not None:
+            _libc.malloc_trim(0)
+        try:
+            with open('/proc/self/clear_refs', 'w') as file:
+                file.write('5')
+            self._baseline_kb = _proc_status_kb('VmRSS')
+        except OSError:
+            self._baseline_kb = None
+        return self
+
+    def __exit__(self, *exc):
+        if self._baseline_kb is not None:
+            self.peak_mb = max(_proc_status_kb('VmHWM') - self._baseline_kb, 0) / 1024
+
+try:
+    _libc = ctypes.CDLL('libc.so.6')
+    _libc.malloc_trim
+except (OSError, AttributeError):
+    _libc = None
+
+def _proc_status_kb(field):
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise OSError(f"{field} not in /proc/self/status")
+
+# Train with the configured engine and record held-out accuracy, wall time and peak memory
+# growth during training
+def train(data_path, config=DEFAULT_CONFIG):
+    start = time.perf_counter()
+    with PeakMemory() as memory:
+        artifact = TRAINING_ENGINES[config['engine']](data_path, config)
+    train_s = time.perf_counter() - start
+    held_out = artifact.pop('held_out', None)
+    if held_out is not None:
+        X_test, y_test = held_out
+        artifact['metrics']['accuracy'] = float(accuracy_score(y_test, artifact['model'].predict(artifact['vectorizer'].transform(X_test))))
+        artifact['metrics']['accuracy_rows'] = len(y_test)
+    artifact['metrics'].update({'train_s': train_s, 'peak_mb': memory.peak_mb})
+    return artifact
+
+def save_artifact(artifact, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    joblib.dump(artifact, tmp)
+    os.replace(tmp, path)
+
+# The artifact for the current data and config: loaded from disk when it exists, otherwise
+# trained, saved atomically and returned. Artifacts for other versions are left in place so
+# switching the config back does not retrain.
+def load_or_train(data_path=DATA_FILE, config=DEFAULT_CONFIG):
+    version = model_version(file_hash(data_path), config)
+    path = artifact_path(data_path, version)
+    if os.path.exists(path):
+        return joblib.load(path)
+
+    artifact = train(data_path, config)
+    artifact.update({'version': version, 'base_version': version, 'config': config,
+                     'data_path': os.path.basename(data_path), 'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                     'folded_rows': 0})
+    save_artifact(artifact, path)
+    return artifact
+
+# Fold newly labelled rows into an incremental (sgd_hashing) artifact with one partial_fit
+# call. The update is fitted on a copy of the model, re-scored on the artifact's held-out
+# sample (the data file is not read again) and then swapped into the artifact, so concurrent predictions never see a half-updated model; fold-ins
+# are serialized so none is lost. The artifact is saved back under its base version, so
+# restarts keep the update; its version changes so caches keyed on it are invalidated.
+_fold_in_lock = threading.Lock()
+
+def fold_in(artifact, df, data_path=DATA_FILE):
+    config = artifact['config']
+    if config['engine'] != 'sgd_hashing':
+        raise ValueError(f"Engine {config['engine']!r} cannot be updated incrementally; retrain instead")
+    missing = [c for c in (config['text_column'], config['label_column']) if c not in df.columns]
+    if missing:
+        raise ValueError(f"Labelled file is missing column(s) {', '.join(map(repr, missing))}")
+    rows = df[[config['text_column'], config['label_column']]].dropna().astype(str)
+    if rows.empty:
+        raise ValueError("Labelled file has no rows with both text and a label")
+    with _fold_in_lock:
+        model = copy.deepcopy(artifact['model'])
+        unknown = sorted(set(rows[config['label_column']]) - set(model.classes_))
+        if unknown:
+            raise ValueError(f"Unknown label(s) {', '.join(map(repr, unknown))}; the model was trained on "
+                             f"{', '.join(repr(str(c)) for c in model.classes_)}")
+        model.partial_fit(artifact['vectorizer'].transform(rows[config['text_column']]), rows[config['label_column']])
+        texts, labels = artifact['held_out_sample']
+        accuracy = float((model.predict(artifact['vectorizer'].transform(texts)) == labels).mean()) if len(labels) else np.nan
+        digest = hashlib.sha256(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()
+        artifact['model'] = model
+        artifact['metrics'] = {**artifact['metrics'], 'accuracy': accuracy, 'accuracy_rows': len(labels)}
+        artifact['version'] = hashlib.sha256(f"{artifact['version']}:{digest}".encode('utf-8')).hexdigest()[:16]
+        artifact['folded_rows'] += len(rows)
+        artifact['trained_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        save_artifact(artifact, artifact_path(data_path, artifact['base_version']))
+    return len(rows)
+
+# Score a CSV export chunk by chunk: each chunk is vectorized, predicted (with a forest's
+# trees spread over n_jobs workers) and appended to `out`, so memory stays bounded by the chunk
+# size whatever the input size. progress(fraction, rows) is called after every chunk.
+def score_csv(source, artifact, out, chunksize=5000, n_jobs=-1, progress=None, total_bytes=None):
+    model, vectorizer = artifact['model'], artifact['vectorizer']
+    if 'n_jobs' in model.get_params():
+        # Shallow copy sharing the fitted state, so the cached model other sessions use is untouched
+        model = copy.copy(model).set_params(n_jobs=n_jobs)
+    text_column = artifact['config']['text_column']
+    rows = 0
+    start = time.perf_counter()
+    for i, chunk in enumerate(pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False)):
+        X = vectorizer.transform(chunk[text_column])
+        probabilities = model.predict_proba(X)
+        chunk['Predicted Sentiment'] = model.classes_[probabilities.argmax(axis=1)]
+        chunk['Prediction Confidence'] = probabilities.max(axis=1).round(4)
+        chunk.to_csv(out, header=(i == 0), index=False)
+        rows += len(chunk)
+        if progress is not None:
+            fraction = min(source.tell() / total_bytes, 1.0) if total_bytes and hasattr(source, 'tell') else None
+            progress(fraction, rows)
+    elapsed = time.perf_counter() - start
+    return {'rows': rows, 'seconds': elapsed, 'rows_per_s': rows / elapsed if elapsed else 0.0}
+
+# Text as the vectorizers see it: both lowercase, and collapsing whitespace does not change tokens
+def normalize_text(text):
+    return ' '.join(str(text).lower().split())
+
+# Bounded LRU of predictions keyed on (model version, normalized text), shared by every
+# session. Hits skip vectorizing and the model entirely. Folding rows into a model changes its
+# version, so stale entries are never served and age out of the LRU.
+class PredictionCache:
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # (label, {class: probability}) for one text
+    def predict(self, artifact, text):
+        key = (artifact['version'], normalize_text(text))
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        model = artifact['model']
+        probabilities = model.predict_proba(artifact['vectorizer'].transform([key[1]]))[0]
+        result = (model.classes_[probabilities.argmax()], {label: float(p) for label, p in zip(model.classes_, probabilities)})
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+# Model selection: every TF-IDF setting below is crossed with every estimator setting and
+# cross-validated on the training split (the held-out split is never touched). TF-IDF is fitted
+# once per setting and fold and cached on disk with joblib.Memory, so candidates that share a
+# vectorizer share its feature matrices; candidate x fold fits run in parallel on all cores.
+SELECTION_VECTORIZERS = [
+    {},
+    {'ngram_range': [1, 2]},
+    {'sublinear_tf': True, 'min_df': 2},
+]
+SELECTION_ESTIMATORS = [
+    ('random_forest', {'n_estimators': 100, 'random_state': 42}),
+    ('random_forest', {'n_estimators': 300, 'random_state': 42}),
+    ('logistic_regression', {'C': 1.0, 'max_iter': 1000}),
+    ('logistic_regression', {'C': 10.0, 'max_iter': 1000}),
+    ('naive_bayes', {}),
+    ('sgd', {'loss': 'log_loss', 'alpha': 1e-4, 'random_state': 42}),
+]
+
+def candidate_configs(vectorizers=SELECTION_VECTORIZERS, estimators=SELECTION_ESTIMATORS):
+    return [{**DEFAULT_CONFIG, 'vectorizer': vectorizer, 'estimator': estimator, 'classifier': params}
+            for vectorizer in vectorizers for estimator, params in estimators]
+
+def describe_config(config):
+    vectorizer = ', '.join(f'{k}={v}' for k, v in config['vectorizer'].items()) or 'defaults'
+    classifier = ', '.join(f'{k}={v}' for k, v in config['classifier'].items() if k != 'random_state')
+    return f"{config['estimator']}({classifier}) on tfidf({vectorizer})"
+
+# Training-split TF-IDF features for each fold, with the fold's fitted vectorizer and raw
+# scoring texts so predictions can be timed from text; the data digest stands in for the data
+# in the joblib.Memory cache key
+def fold_features(data_path, data_digest, vectorizer, folds, config):
+    df = load_feedback(data_path)
+    X = df[config['text_column']]
+    y = df[config['label_column']].astype(str).to_numpy()
+    train_rows, _ = train_test_split(np.arange(len(df)), test_size=config['test_size'], random_state=config['random_state'])
+    features = []
+    for fit_rows, score_rows in KFold(folds, shuffle=True, random_state=config['random_state']).split(train_rows):
+        fit_rows, score_rows = train_rows[fit_rows], train_rows[score_rows]
+        tfidf = TfidfVectorizer(**vectorizer_params({'vectorizer': vectorizer}))
+        features.append((tfidf.fit_transform(X.iloc[fit_rows]), y[fit_rows], tfidf, X.iloc[score_rows].tolist(), y[score_rows]))
+    return features
+
+# One candidate on one fold, run in a worker process. Batch throughput and single-row latency
+# are timed from raw text (vectorize and predict), as the app serves them; the latency is the
+# median over different rows. Peak memory is the worker's resident memory growth during fit.
+def evaluate_fold(estimator, params, X_fit, y_fit, vectorizer, texts, y_score, latency_calls=50):
+    model = ESTIMATORS[estimator](**params)
+    start = time.perf_counter()
+    with PeakMemory() as memory:
+        model.fit(X_fit, y_fit)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = model.predict(vectorizer.transform(texts))
+    batch_s = time.perf_counter() - start
+    latencies = []
+    for text in texts[:latency_calls]:
+        start = time.perf_counter()
+        model.predict_proba(vectorizer.transform([text]))
+        latencies.append(time.perf_counter() - start)
+    return {'accuracy': accuracy_score(y_score, predicted), 'fit_s': fit_s, 'peak_mb': memory.peak_mb,
+            'predict_ms': np.median(latencies) * 1000, 'rows_per_s': len(texts) / batch_s,
+            'size_mb': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 1024 ** 2}
+
+# Cross-validated scores of every candidate, best mean accuracy first
+def select_models(data_path=DATA_FILE, candidates=None, folds=5, n_jobs=-1, progress=None):
+    candidates = candidates or candidate_configs()
+    digest = file_hash(data_path)
+    cached_features = joblib.Memory(os.path.join(model_dir(data_path), 'features'), verbose=0).cache(
+        fold_features, ignore=['data_path'])
+    features = {}
+    for config in candidates:
+        key = json.dumps(config['vectorizer'], sort_keys=True)
+        if key not in features:
+            features[key] = cached_features(data_path, digest, config['vectorizer'], folds, DEFAULT_CONFIG)
+
+    tasks = [(i, fold) for i in range(len(candidates)) for fold in range(folds)]
+    results = joblib.Parallel(n_jobs=n_jobs, return_as='generator')(
+        joblib.delayed(evaluate_fold)(candidates[i]['estimator'], candidates[i]['classifier'],
+                                      *features[json.dumps(candidates[i]['vectorizer'], sort_keys=True)][fold])
+        for i, fold in tasks)
+    per_fold = []
+    for done, ((i, fold), result) in enumerate(zip(tasks, results), 1):
+        per_fold.append({'candidate': i, 'fold': fold, **result})
+        if progress is not None:
+            progress(done / len(tasks))
+
+    scores = pd.DataFrame(per_fold).groupby('candidate').agg(
+        accuracy=('accuracy', 'mean'), accuracy_std=('accuracy', 'std'), fit_s=('fit_s', 'mean'),
+        predict_ms=('predict_ms', 'median'), rows_per_s=('rows_per_s', 'mean'), peak_mb=('peak_mb', 'max'),
+        size_mb=('size_mb', 'mean'))
+    scores.insert(0, 'candidate', [describe_config(candidates[i]) for i in scores.index])
+    scores['config'] = [candidates[i] for i in scores.index]
+    return scores.sort_values('accuracy', ascending=False).reset_index(drop=True)
+
+def promoted_path(data_path):
+    return os.path.join(model_dir(data_path), 'promoted.json')
+
+# Make a config the one the app serves: train (or load) its artifact, which also scores it on
+# the held-out split, and record it in promoted.json
+def promote(config, data_path=DATA_FILE, cv_accuracy=None):
+    artifact = load_or_train(data_path, config)
+    record = {'config': config, 'version': artifact['version'], 'name': describe_config(config),
+              'cv_accuracy': cv_accuracy, 'held_out_accuracy': artifact['metrics']['accuracy'],
+              'promoted_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    os.makedirs(model_dir(data_path), exist_ok=True)
+    tmp = promoted_path(data_path) + '.tmp'
+    with open(tmp, 'w') as file:
+        json.dump(record, file, indent=2)
+    os.replace(tmp, promoted_path(data_path))
+    return record
+
+def promoted_model(data_path=DATA_FILE):
+    if not os.path.exists(promoted_path(data_path)):
+        return None
+    with open(promoted_path(data_path)) as file:
+        return json.load(file)
+
+# Configs the app offers: the promoted one first when there is one, then the built-in engines
+def model_configs(data_path=DATA_FILE):
+    promoted = promoted_model(data_path)
+    if promoted is None:
+        return dict(MODEL_CONFIGS)
+    return {f"Promoted: {promoted['name']}": promoted['config'], **MODEL_CONFIGS}
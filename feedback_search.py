@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import shutil
+import time
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from feedback_data import DATA_FILE, TEXT_COLUMNS, cache_dir, cache_path, load_feedback
+
+# Full-text search over the ticket text columns for Customer-Feedback-App.py. The six text
+# columns of each ticket form one document. The index is a term -> postings (ticket row, term
+# frequency) layout in CSC arrays, built once per data version and saved as .npy files next to
+# the Feather cache, which are memory-mapped on load. Queries are ranked with BM25 and only
+# touch the postings of their own terms.
+
+TOKEN_PATTERN = r'(?u)\b\w+\b'
+FILTER_COLUMNS = ['Service Type', 'Status', 'Sentiment']
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def tokenize(text):
+    return re.findall(TOKEN_PATTERN, text.lower())
+
+def index_dir(path):
+    return cache_path(path).replace('.feather', '.search')
+
+# Postings, document lengths and filter codes for every ticket
+def build_index(df, directory):
+    text = [df[column].fillna('').astype(str) for column in TEXT_COLUMNS]
+    documents = text[0].str.cat(text[1:], sep=' ')
+    vectorizer = CountVectorizer(token_pattern=TOKEN_PATTERN, dtype=np.uint32)
+    postings = vectorizer.fit_transform(documents).tocsc()
+    postings.sort_indices()
+    arrays = {
+        'terms': vectorizer.get_feature_names_out().astype(str),
+        'indptr': postings.indptr.astype(np.int64),
+        'docs': postings.indices.astype(np.uint32),
+        'tf': postings.data.astype(np.uint32),
+        'doc_len': np.asarray(postings.sum(axis=1)).ravel().astype(np.uint32),
+    }
+    meta = {'documents': len(df), 'filters': {}}
+    for column in FILTER_COLUMNS:
+        values = df[column].astype('category')
+        arrays[f'filter_{column}'] = values.cat.codes.to_numpy().astype(np.int16)
+        meta['filters'][column] = [str(c) for c in values.cat.categories]
+
+    tmp = directory + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, f'{name}.npy'), array)
+    with open(os.path.join(tmp, 'meta.json'), 'w') as file:
+        json.dump(meta, file)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+
+class SearchIndex:
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'meta.json')) as file:
+            meta = json.load(file)
+        load = lambda name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+        self.terms, self.indptr, self.docs, self.tf, self.doc_len = (load(n) for n in ['terms', 'indptr', 'docs', 'tf', 'doc_len'])
+        self.filters = {column: (load(f'filter_{column}'), categories) for column, categories in meta['filters'].items()}
+        self.documents = meta['documents']
+        self.avg_len = float(np.mean(self.doc_len)) if self.documents else 0.0
+
+    def _postings(self, term):
+        position = np.searchsorted(self.terms, term)
+        if position == len(self.terms) or self.terms[position] != term:
+            return None
+        start, end = self.indptr[position], self.indptr[position + 1]
+        return self.docs[start:end], self.tf[start:end]
+
+    # Ranked hits for a multi-term query: (total matches, rows, scores) for one page, best
+    # first. filters maps a FILTER_COLUMNS column to the values to keep.
+    def search(self, query, filters=None, page=0, page_size=20):
+        docs, scores = [], []
+        for term in set(tokenize(query)):
+            postings = self._postings(term)
+            if postings is None:
+                continue
+            term_docs, tf = postings
+            idf = np.log(1 + (self.documents - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+            tf = tf.astype(np.float64)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[term_docs] / self.avg_len)
+            docs.append(term_docs)
+            scores.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+        if not docs:
+            return 0, np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        # Sum the per-term scores of each matching ticket
+        docs, scores = np.concatenate(docs), np.concatenate(scores)
+        order = np.argsort(docs, kind='stable')
+        docs, scores = docs[order], scores[order]
+        starts = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+        docs, scores = docs[starts], np.add.reduceat(scores, starts)
+
+        for column, allowed in (filters or {}).items():
+            if allowed:
+                codes, categories = self.filters[column]
+                keep = np.isin(codes[docs], [categories.index(v) for v in allowed if v in categories])
+                docs, scores = docs[keep], scores[keep]
+
+        ranked = np.argsort(-scores, kind='stable')[page * page_size:(page + 1) * page_size]
+        return len(docs), docs[ranked].astype(np.int64), scores[ranked]
+
+# Index for the data file's current content, built on first use for each data version
+def load_index(path=DATA_FILE):
+    directory = index_dir(path)
+    if not os.path.exists(os.path.join(directory, 'meta.json')):
+        prefix = os.path.splitext(os.path.basename(path))[0] + '.v'
+        for stale in os.listdir(cache_dir(path)) if os.path.isdir(cache_dir(path)) else []:
+            if stale.startswith(prefix) and stale.endswith('.search'):
+                shutil.rmtree(os.path.join(cache_dir(path), stale), ignore_errors=True)
+        build_index(load_feedback(path), directory)
+    return SearchIndex(directory)
+
+# Search that also reports its latency in milliseconds
+def timed_search(index, query, filters=None, page=0, page_size=20):
+    start = time.perf_counter()
+    total, rows, scores = index.search(query, filters, page, page_size)
+    return total, rows, scores, (time.perf_counter() - start) * 1000
@@ -0,0 +1,224 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from task_metrics import ALL_METRICS, MetricsHistory
+
+# Threshold alerts over the live metrics stream. Rules are declarative strings, one per line:
+#   CPU Usage (%) > 90 for 30s            value beyond a threshold for a sustained duration
+#   Disk Usage (%) >= 95                  value beyond a threshold on the latest sample
+#   Swap Memory Usage (%) rising 5%/min   least-squares slope over the last minute (or 'over 5m')
+#   ... clear 85                          optional hysteresis level the value must cross back
+# Rules compile into per-rule arrays and every sample is evaluated for all rules at once:
+# sustained rules keep the time their breach started (the window holds iff that is at least
+# the duration ago), and rate rules share one slope computation per (metric, window) over the
+# engine's recent history. Alerts fire once per episode, clear only past the hysteresis level
+# and are not re-raised within the cooldown, so noisy metrics do not flap.
+ALERT_LOG = 'alerts.log'
+DEFAULT_ALERT_RULES = [
+    'CPU Usage (%) > 90 for 30s',
+    'Memory Usage (%) > 90 for 1m',
+    'Swap Memory Usage (%) rising 5%/min',
+    'Disk Usage (%) > 95',
+]
+# Default hysteresis: thresholds clear 5% of their value back, rates at half the rate
+ALERT_CLEAR_FRACTION = 0.05
+RATE_CLEAR_FRACTION = 0.5
+DURATION_UNITS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600}
+_DURATION = r'(\d+(?:\.\d+)?)\s*(s|sec|min|m|hour|h)'
+THRESHOLD_RULE = re.compile(rf'^(?P<metric>.+?)\s+(?P<op>>=|<=|>|<)\s+(?P<value>-?\d+(?:\.\d+)?)'
+                            rf'(?:\s+for\s+(?P<duration>{_DURATION}))?(?:\s+clear\s+(?P<clear>-?\d+(?:\.\d+)?))?$')
+RATE_RULE = re.compile(rf'^(?P<metric>.+?)\s+(?P<direction>rising|falling)\s+(?P<rate>\d+(?:\.\d+)?)%?\s*/\s*'
+                       rf'(?P<unit>s|sec|min|m|hour|h)(?:\s+over\s+(?P<window>{_DURATION}))?'
+                       rf'(?:\s+clear\s+(?P<clear>\d+(?:\.\d+)?))?$')
+
+def parse_duration(text):
+    amount, unit = re.fullmatch(_DURATION, text.strip()).groups()
+    return float(amount) * DURATION_UNITS[unit]
+
+# One rule string as a dict of the arrays' fields; raises ValueError on bad syntax or metric
+def parse_alert_rule(text, metrics=ALL_METRICS):
+    text = ' '.join(text.split())
+    match = THRESHOLD_RULE.match(text)
+    if match:
+        sign = 1.0 if match['op'].startswith('>') else -1.0
+        trigger = float(match['value'])
+        clear = float(match['clear']) if match['clear'] else trigger - sign * ALERT_CLEAR_FRACTION * abs(trigger)
+        rule = {'metric': match['metric'], 'kind': 'threshold', 'sign': sign, 'strict': len(match['op']) == 1,
+                'trigger': trigger, 'clear': clear, 'duration_s': parse_duration(match['duration']) if match['duration'] else 0.0,
+                'window_s': 0.0}
+    else:
+        match = RATE_RULE.match(text)
+        if not match:
+            raise ValueError(f"Cannot parse rule {text!r}")
+        sign = 1.0 if match['direction'] == 'rising' else -1.0
+        per_s = DURATION_UNITS[match['unit']]
+        rate = float(match['rate']) / per_s
+        rule = {'metric': match['metric'], 'kind': 'rate', 'sign': sign, 'strict': False,
+                'trigger': sign * rate,
+                'clear': sign * (float(match['clear']) / per_s if match['clear'] else RATE_CLEAR_FRACTION * rate),
+                'duration_s': 0.0, 'window_s': parse_duration(match['window']) if match['window'] else float(per_s)}
+    if rule['metric'] not in metrics:
+        raise ValueError(f"Unknown metric {rule['metric']!r} in rule {text!r}")
+    rule['text'] = text
+    return rule
+
+class AlertEngine:
+    def __init__(self, rules=DEFAULT_ALERT_RULES, log_path=ALERT_LOG, cooldown_s=60.0, timings=None, max_events=500,
+                 history=None):
+        self.log_path = log_path
+        self.cooldown_s = cooldown_s
+        self.timings = timings
+        self.events = deque(maxlen=max_events)
+        # Recent samples for rate rules. A shared history (the sampler's) already holds every
+        # sample when observe() is called; otherwise the engine records into a buffer of its own
+        # sized to the longest rate window.
+        self.shared_history = history is not None
+        self.history = history if history is not None else MetricsHistory(ALL_METRICS, retention_s=60)
+        self._lock = threading.Lock()
+        self.rules = []
+        self._since, self._firing = np.zeros(0), np.zeros(0, dtype=bool)
+        self._fired_at, self._value = np.zeros(0), np.zeros(0)
+        self.set_rules(rules)
+
+    # Compile rules (duplicates collapsed); returns the parse errors. Rules whose text is unchanged
+    # keep their alert state, and firing rules that were removed are logged as resolved.
+    def set_rules(self, lines):
+        rules, errors = {}, []
+        for line in lines:
+            if line.strip() and not line.strip().startswith('#'):
+                try:
+                    rule = parse_alert_rule(line)
+                    rules.setdefault(rule['text'], rule)
+                except ValueError as e:
+                    errors.append(str(e))
+        rules = list(rules.values())
+        column = lambda field, dtype=float: np.array([rule[field] for rule in rules], dtype=dtype)
+        texts = {rule['text'] for rule in rules}
+        with self._lock:
+            previous = {rule['text']: i for i, rule in enumerate(self.rules)}
+            timestamp_ms = self.history.last_timestamp_ms or time.time_ns() // 1_000_000
+            events = [self._event('resolved', i, timestamp_ms) for text, i in previous.items()
+                      if text not in texts and self._firing[i]]
+            kept = np.array([previous.get(rule['text'], -1) for rule in rules], dtype=np.intp)
+            carried = kept >= 0
+
+            def carry(state, fill):
+                new = np.full(len(rules), fill, dtype=state.dtype)
+                new[carried] = state[kept[carried]]
+                return new
+
+            self.rules = rules
+            self._col = np.array([ALL_METRICS.index(rule['metric']) for rule in rules], dtype=np.intp)
+            self._rate = column('kind', object) == 'rate'
+            self._sign, self._strict = column('sign'), column('strict', bool)
+            self._trigger, self._clear = column('trigger'), column('clear')
+            self._duration, self._window = column('duration_s'), column('window_s')
+            # Rate rules sharing a metric and window share one slope computation
+            groups = sorted({(self._col[i], self._window[i]) for i in np.flatnonzero(self._rate)})
+            self._groups = (np.array([g[0] for g in groups], dtype=np.intp), np.array([g[1] for g in groups]))
+            self._group = np.zeros(len(rules), dtype=np.intp)
+            for i in np.flatnonzero(self._rate):
+                self._group[i] = groups.index((self._col[i], self._window[i]))
+            self._since, self._firing = carry(self._since, np.nan), carry(self._firing, False)
+            self._fired_at, self._value = carry(self._fired_at, -np.inf), carry(self._value, np.nan)
+            retention = int(max(self._window.max(initial=0), 60)) + 10
+            if not self.shared_history and retention != self.history.retention_s:
+                self.history = self.history.with_retention(retention, 1)
+        if events:
+            self._write(events)
+        return errors
+
+    # Least-squares slope per second of each (metric, window) group over the recent history
+    def _slopes(self, now_s):
+        cols, windows = self._groups
+        if not len(cols):
+            return np.zeros(0)
+        times, values = self.history.window(since_ms=int((now_s - windows.max()) * 1000))
+        t = (times / 1000.0 - now_s)[:, None]
+        v = values[:, cols]
+        mask = (t >= -windows[None, :]) & ~np.isnan(v)
+        n = mask.sum(axis=0)
+        t, v = np.where(mask, t, 0.0), np.where(mask, v, 0.0)
+        st, sv = t.sum(axis=0), v.sum(axis=0)
+        denominator = n * (t * t).sum(axis=0) - st * st
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes = (n * (t * v).sum(axis=0) - st * sv) / denominator
+        # Need a few samples covering at least half the window before trusting a trend
+        span = np.where(mask, -t, 0.0).max(axis=0, initial=0.0)
+        return np.where((n >= 3) & (span >= windows / 2) & (denominator > 0), slopes, np.nan)
+
+    # Feed one sample (the sampler calls this for every snapshot) and raise or clear alerts
+    def observe(self, metrics, timestamp_ms):
+        start = time.perf_counter()
+        with self._lock:
+            if not self.shared_history:
+                self.history.append(metrics, timestamp_ms)
+            if not self.rules:
+                return
+            now_s = timestamp_ms / 1000.0
+            latest = self.history.window(1)[1][0]
+            value = np.where(self._rate, self._slopes(now_s)[self._group] if len(self._groups[0]) else np.nan,
+                             latest[self._col])
+            level = self._sign * value
+            breach = np.where(self._strict, level > self._sign * self._trigger, level >= self._sign * self._trigger)
+            self._since = np.where(breach, np.where(np.isnan(self._since), now_s, self._since), np.nan)
+            ready = breach & (now_s - self._since >= self._duration)
+            # Firing rules stay up until the value crosses back past the clear level; no data keeps state
+            holding = (level >= self._sign * self._clear) | np.isnan(value)
+            firing = np.where(self._firing, holding, ready)
+            fired = np.flatnonzero(firing & ~self._firing)
+            # An episode starting within the cooldown of the rule's last alert is suppressed: it is
+            # neither active nor logged, and fires once the cooldown has passed if still breached
+            cooling = now_s - self._fired_at[fired] < self.cooldown_s
+            firing[fired[cooling]] = False
+            fired = fired[~cooling]
+            resolved = np.flatnonzero(self._firing & ~firing)
+            self._firing, self._value = firing, value
+            self._fired_at[fired] = now_s
+            events = [self._event('fired', i, timestamp_ms) for i in fired]
+            events += [self._event('resolved', i, timestamp_ms) for i in resolved]
+        if events:
+            self._write(events)
+        if self.timings is not None:
+            self.timings.record('alerts.evaluate', (time.perf_counter() - start) * 1000)
+
+    # Rule value as shown to users: rates per minute rather than per second
+    def _display_value(self, i):
+        return float(self._value[i]) * (DURATION_UNITS['min'] if self.rules[i]['kind'] == 'rate' else 1)
+
+    def _event(self, kind, i, timestamp_ms):
+        rule = self.rules[i]
+        value = self._display_value(i)
+        event = {'time': datetime.fromtimestamp(timestamp_ms / 1000).isoformat(timespec='seconds'), 'event': kind,
+                 'rule': rule['text'], 'metric': rule['metric'], 'value': round(value, 3),
+                 'unit': 'per min' if rule['kind'] == 'rate' else ''}
+        self.events.append(event)
+        return event
+
+    # Append-only JSON-lines log of every fired and resolved alert
+    def _write(self, events):
+        for event in events:
+            if event['event'] == 'fired':
+                logging.warning(f"Alert fired: {event['rule']} (value {event['value']})")
+        if self.log_path:
+            with open(self.log_path, 'a') as file:
+                file.writelines(json.dumps(event) + '\n' for event in events)
+
+    # Currently firing rules with the value that triggered them
+    def active(self):
+        with self._lock:
+            rows = [{'Rule': self.rules[i]['text'], 'Since': self._fired_at[i], 'Value': self._display_value(i)}
+                    for i in np.flatnonzero(self._firing)]
+        for row in rows:
+            row['Since'] = datetime.fromtimestamp(row['Since']).isoformat(timespec='seconds')
+        return pd.DataFrame(rows, columns=['Rule', 'Since', 'Value'])
+
+    def recent_events(self):
+        with self._lock:
+            return pd.DataFrame(list(self.events)[::-1], columns=['time', 'event', 'rule', 'metric', 'value', 'unit'])
@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import psutil
+
+# Data backends for the task managers: psutil itself, or a simulated host for demos, benchmarks
+# and tests. Both expose the subset of the psutil module API that the collectors use.
+
+FakeCpuTimes = namedtuple('FakeCpuTimes', ['user', 'system', 'idle'])
+FakeProcessCpuTimes = namedtuple('FakeProcessCpuTimes', ['user', 'system'])
+FakeIoCounters = namedtuple('FakeIoCounters', ['read_count', 'write_count', 'read_bytes', 'write_bytes'])
+FakeCtxSwitches = namedtuple('FakeCtxSwitches', ['voluntary', 'involuntary'])
+FakeMemory = namedtuple('FakeMemory', ['total', 'available', 'percent'])
+FakeSwap = namedtuple('FakeSwap', ['total', 'used', 'percent'])
+FakeDiskUsage = namedtuple('FakeDiskUsage', ['total', 'used', 'free', 'percent'])
+FakeNetIo = namedtuple('FakeNetIo', ['bytes_sent', 'bytes_recv', 'errin', 'errout', 'dropin', 'dropout'])
+FakeDiskIo = namedtuple('FakeDiskIo', ['read_bytes', 'write_bytes'])
+FakeTemperature = namedtuple('FakeTemperature', ['label', 'current'])
+FakeCpuFreq = namedtuple('FakeCpuFreq', ['current', 'min', 'max'])
+
+# Deterministic stand-in for the psutil module, used for demos and benchmarks. It simulates
+# n_processes processes with a heavy-tailed spread of CPU and I/O activity; each simulated
+# second, churn_per_s of them exit and are replaced by new PIDs. State advances lazily to the
+# current reading of `clock`, so a benchmark can drive it with a manual clock. Everything is
+# derived from `seed`, so two backends built with the same arguments produce the same data.
+class FakeBackend:
+    NAMES = ['python', 'postgres', 'nginx', 'java', 'node', 'sshd', 'chrome', 'redis-server', 'systemd', 'bash']
+    STATUSES = ['running', 'sleeping', 'sleeping', 'sleeping', 'idle', 'stopped']
+    MEMORY_TOTAL = 64 * 1024 ** 3
+    DISK_TOTAL = 1024 ** 4
+
+    def __init__(self, n_processes=1000, churn_per_s=0.01, io_bytes_per_s=64 * 1024, max_threads=64,
+                 cpu_count=8, seed=0, clock=time.monotonic, max_pid=None):
+        if max_pid is not None and n_processes > max_pid:
+            raise ValueError(f"{n_processes} processes do not fit in pids 1-{max_pid}")
+        self.churn_per_s = churn_per_s
+        self.max_pid = max_pid
+        self.io_bytes_per_s = io_bytes_per_s
+        self.max_threads = max_threads
+        self.cpu_count = cpu_count
+        self._rng = np.random.default_rng(seed)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next_pid = 1
+        self._boot_time = 1_700_000_000.0
+        self._elapsed = 0.0
+        self._synced_at = clock()
+        self._cpu = np.zeros(3)
+        self._net = np.zeros(2)
+        self._disk_io = np.zeros(2)
+        # Processes use about 60% of memory and half of the CPUs in total
+        self._memory_scale = 60 / max(n_processes, 1)
+        self._cpu_scale = cpu_count / max(n_processes, 1)
+        self._procs = self._spawn(n_processes)
+        self._reindex()
+
+    # New pids count up; with max_pid set they wrap around like the kernel's, skipping pids still
+    # in use, so an exited process's pid is eventually reused
+    def _new_pids(self, n, in_use=()):
+        if self.max_pid is None:
+            pids = np.arange(self._next_pid, self._next_pid + n)
+            self._next_pid += n
+            return pids
+        in_use, pids, pid = set(in_use), [], self._next_pid
+        while len(pids) < n:
+            if pid not in in_use:
+                pids.append(pid)
+            pid = pid % self.max_pid + 1
+        self._next_pid = pid
+        return np.array(pids, dtype=np.int64)
+
+    def _spawn(self, n, in_use=()):
+        rng = self._rng
+        pids = self._new_pids(n, in_use)
+        return {
+            'pid': pids,
+            'create_time': np.full(n, self._boot_time + self._elapsed),
+            'name': rng.integers(len(self.NAMES), size=n),
+            'status': rng.integers(len(self.STATUSES), size=n),
+            'num_threads': rng.integers(1, self.max_threads + 1, size=n),
+            'memory_percent': rng.exponential(self._memory_scale, size=n),
+            'cpu_share': np.minimum(rng.pareto(3, size=n) * self._cpu_scale, 1.0),
+            'io_share': rng.pareto(2, size=n),
+            'cpu_user': np.zeros(n),
+            'cpu_system': np.zeros(n),
+            'read_count': np.zeros(n, dtype=np.int64),
+            'write_count': np.zeros(n, dtype=np.int64),
+            'read_bytes': np.zeros(n, dtype=np.int64),
+            'write_bytes': np.zeros(n, dtype=np.int64),
+            'ctx': np.zeros(n, dtype=np.int64),
+        }
+
+    def _reindex(self):
+        self._index = {pid: i for i, pid in enumerate(self._procs['pid'].tolist())}
+
+    # Advance the simulation to the current clock reading, vectorized over all processes
+    def _sync(self):
+        now = self._clock()
+        dt = now - self._synced_at
+        if dt <= 0:
+            return
+        self._synced_at = now
+        self._elapsed += dt
+        rng, procs = self._rng, self._procs
+        n = len(procs['pid'])
+
+        busy = np.minimum(procs['cpu_share'] * rng.uniform(0.5, 1.5, size=n), 1.0) * dt
+        procs['cpu_user'] += busy * 0.7
+        procs['cpu_system'] += busy * 0.3
+        reads = rng.poisson(procs['io_share'] * self.io_bytes_per_s * dt)
+        writes = reads // 2
+        procs['read_bytes'] += reads
+        procs['write_bytes'] += writes
+        procs['read_count'] += reads // 4096
+        procs['write_count'] += writes // 4096
+        procs['ctx'] += rng.poisson(50 * dt, size=n)
+
+        used = min(busy.sum(), self.cpu_count * dt)
+        self._cpu += [used * 0.7, used * 0.3, self.cpu_count * dt - used]
+        self._disk_io += [reads.sum(), writes.sum()]
+        self._net += rng.poisson(1024 * 1024 * dt, size=2)
+
+        exiting = rng.binomial(n, min(1.0, self.churn_per_s * dt))
+        if exiting:
+            keep = np.ones(n, dtype=bool)
+            keep[rng.choice(n, exiting, replace=False)] = False
+            spawned = self._spawn(exiting, in_use=procs['pid'][keep].tolist())
+            self._procs = {key: np.concatenate([values[keep], spawned[key]]) for key, values in procs.items()}
+            self._reindex()
+
+    def pids(self):
+        with self._lock:
+            self._sync()
+            return self._procs['pid'].tolist()
+
+    def Process(self, pid):
+        if pid not in self._index:
+            raise psutil.NoSuchProcess(pid)
+        return FakeProcess(self, pid)
+
+    def _create_time(self, pid):
+        with self._lock:
+            i = self._index.get(pid)
+            if i is None:
+                raise psutil.NoSuchProcess(pid)
+            return float(self._procs['create_time'][i])
+
+    def _process_info(self, pid):
+        with self._lock:
+            i = self._index.get(pid)
+            if i is None:
+                raise psutil.NoSuchProcess(pid)
+            procs = self._procs
+            return {
+                'pid': pid,
+                'name': self.NAMES[procs['name'][i]],
+                'username': 'fake',
+                'status': self.STATUSES[procs['status'][i]],
+                'create_time': float(procs['create_time'][i]),
+                'num_threads': int(procs['num_threads'][i]),
+                'memory_percent': float(procs['memory_percent'][i]),
+                'cpu_percent': 0.0,
+                'cpu_times': FakeProcessCpuTimes(float(procs['cpu_user'][i]), float(procs['cpu_system'][i])),
+                'io_counters': FakeIoCounters(int(procs['read_count'][i]), int(procs['write_count'][i]),
+                                              int(procs['read_bytes'][i]), int(procs['write_bytes'][i])),
+                'num_ctx_switches': FakeCtxSwitches(int(procs['ctx'][i]), 0),
+            }
+
+    def cpu_times(self):
+        with self._lock:
+            self._sync()
+            return FakeCpuTimes(*self._cpu.tolist())
+
+    def virtual_memory(self):
+        with self._lock:
+            percent = float(min(self._procs['memory_percent'].sum(), 100.0))
+        return FakeMemory(self.MEMORY_TOTAL, self.MEMORY_TOTAL * (100 - percent) / 100, percent)
+
+    def swap_memory(self):
+        return FakeSwap(8 * 1024 ** 3, 400 * 1024 ** 2, 4.9)
+
+    def disk_usage(self, path):
+        with self._lock:
+            used = min(self.DISK_TOTAL // 2 + int(self._disk_io[1]), self.DISK_TOTAL)
+        return FakeDiskUsage(self.DISK_TOTAL, used, self.DISK_TOTAL - used, round(used / self.DISK_TOTAL * 100, 1))
+
+    def net_io_counters(self):
+        with self._lock:
+            self._sync()
+            sent, recv = self._net.tolist()
+        return FakeNetIo(int(sent), int(recv), 0, 0, 0, 0)
+
+    def disk_io_counters(self):
+        with self._lock:
+            self._sync()
+            return FakeDiskIo(*(int(v) for v in self._disk_io))
+
+    def sensors_battery(self):
+        return None
+
+    def sensors_temperatures(self):
+        return {'coretemp': [FakeTemperature('Package id 0', 55.0)]}
+
+    def cpu_freq(self):
+        return FakeCpuFreq(2400.0, 800.0, 3600.0)
+
+# Like a psutil.Process, a handle keeps the start time of the process it was created for, and
+# as_dict() keeps reporting it even after the pid has been reused; is_running() tells them apart
+class FakeProcess:
+    def __init__(self, backend, pid):
+        self.backend = backend
+        self.pid = pid
+        self._create_time = backend._create_time(pid)
+
+    def is_running(self):
+        try:
+            return self.backend._create_time(self.pid) == self._create_time
+        except psutil.NoSuchProcess:
+            return False
+
+    def as_dict(self, attrs, ad_value=None):
+        info = {**self.backend._process_info(self.pid), 'create_time': self._create_time}
+        return {attr: info.get(attr, ad_value) for attr in attrs}
+
+# Source of system metrics and processes: the psutil module itself, or FakeBackend when
+# TASK_MANAGER_BACKEND=fake (sized by TASK_MANAGER_FAKE_PROCESSES)
+def make_data_backend():
+    if os.environ.get('TASK_MANAGER_BACKEND') == 'fake':
+        return FakeBackend(n_processes=int(os.environ.get('TASK_MANAGER_FAKE_PROCESSES', 1000)))
+    return psutil
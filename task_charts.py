@@ -0,0 +1,41 @@
+import io
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+# Matplotlib renderings of the metric history and top processes, used by the static chart
+# backend and the PNG export.
+
+# Function to build the matplotlib figure of the metrics
+def build_metrics_figure(metrics_df, selected_metrics):
+    num_metrics = len(selected_metrics)
+    num_rows = (num_metrics + 1) // 2  # Calculate rows needed
+
+    fig, axs = plt.subplots(num_rows, 2, figsize=(12, num_rows * 4))
+    axs = axs.flatten()  # Flatten in case of a single row
+
+    for i, metric in enumerate(selected_metrics):
+        sns.lineplot(x='Time', y=metric, data=metrics_df, ax=axs[i])
+        axs[i].set_title(metric)
+
+    for j in range(i + 1, len(axs)):
+        fig.delaxes(axs[j])
+
+    plt.tight_layout()
+    return fig
+
+# Function to export the metrics charts as PNG bytes
+def metrics_figure_png(metrics_df, selected_metrics):
+    fig = build_metrics_figure(metrics_df, selected_metrics)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return buffer.getvalue()
+
+# Function to create and return the figure for each selected metric
+def create_figure(metric, process_df, top_n):
+    fig, ax = plt.subplots()
+    top_processes = process_df.nlargest(top_n, metric)
+    ax.barh(top_processes['Name'], top_processes[metric])
+    ax.set_xlabel(metric)
+    ax.set_title(f'Top {top_n} Processes by {metric}')
+    return fig, ax
@@ -0,0 +1,221 @@
+import logging
+import socket
+import socketserver
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from task_backend import make_data_backend
+from task_metrics import ALL_METRICS, MetricsCollector
+from task_processes import ProcessTable
+
+# Multi-host fleet view for 2-sim-task-mgmr.py: every node runs the script headless as an agent
+#   python 2-sim-task-mgmr.py --agent DASHBOARD_HOST:PORT [--interval 1] [--name NAME]
+# and streams binary snapshots to the dashboard, which listens on TASK_MANAGER_FLEET_PORT
+# (bound to TASK_MANAGER_FLEET_BIND, 127.0.0.1 unless set to e.g. 0.0.0.0 for remote agents).
+# A snapshot frame is zlib-compressed and carries only what changed since the previous one:
+# metrics whose value moved, pids that exited, name/start time of new pids, and fixed-width
+# records for new or changed process rows. Each new connection starts from an empty state.
+FLEET_PORT = 8765
+FRAME_MAGIC = b'TM1'
+FRAME_HEADER = struct.Struct('<3sQQ')  # magic, seq, timestamp_ms
+FRAME_LENGTH = struct.Struct('<I')
+PROCESS_STATUSES = ['running', 'sleeping', 'disk-sleep', 'stopped', 'tracing-stop', 'zombie', 'dead',
+                    'wake-kill', 'waking', 'idle', 'locked', 'waiting', 'parked']
+FLEET_ROW = np.dtype([('pid', '<u4'), ('status', 'u1'), ('num_threads', '<u2'), ('memory_percent', '<f4'),
+                      ('cpu_percent', '<f4'), ('read_bytes_per_s', '<f4'), ('write_bytes_per_s', '<f4')])
+FLEET_FIELDS = list(FLEET_ROW.names[1:])
+# Rows are quantized before comparison so float noise does not count as a change
+FLEET_DECIMALS = {'memory_percent': 2, 'cpu_percent': 1, 'read_bytes_per_s': 0, 'write_bytes_per_s': 0}
+
+def _pack_array(arr):
+    data = np.ascontiguousarray(arr).tobytes()
+    return FRAME_LENGTH.pack(len(data)) + data
+
+def _unpack_array(buf, offset, dtype):
+    (size,) = FRAME_LENGTH.unpack_from(buf, offset)
+    offset += FRAME_LENGTH.size
+    return np.frombuffer(buf, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=offset), offset + size
+
+# Agent side: turns consecutive (metrics, process frame) samples into delta frames
+class SnapshotEncoder:
+    def __init__(self):
+        self.seq = 0
+        self._metrics = np.full(len(ALL_METRICS), np.nan)
+        self._pids = pd.Index([], dtype='uint32')
+        self._rows = np.zeros(0, FLEET_ROW)
+        self._create = np.zeros(0)
+
+    def encode(self, metrics, processes, timestamp_ms=None):
+        values = np.array([metrics.get(m) if isinstance(metrics.get(m), (int, float)) else np.nan
+                           for m in ALL_METRICS], dtype=float)
+        moved = np.flatnonzero(~((values == self._metrics) | (np.isnan(values) & np.isnan(self._metrics))))
+
+        rows = np.zeros(len(processes), FLEET_ROW)
+        rows['pid'] = processes['pid'].to_numpy()
+        status = pd.Categorical(processes['status'].astype(str), categories=PROCESS_STATUSES).codes
+        rows['status'] = np.where(status < 0, 255, status)
+        rows['num_threads'] = processes['num_threads'].clip(0, 65535).to_numpy()
+        for field, decimals in FLEET_DECIMALS.items():
+            rows[field] = np.nan_to_num(processes[field].to_numpy(dtype=float).round(decimals))
+        create = processes['create_time'].to_numpy(dtype='datetime64[ms]').astype(np.int64) / 1000
+
+        # Match rows to the previous frame by pid; a reused pid (new start time) is a new process
+        prev = self._pids.get_indexer(rows['pid'])
+        known = prev >= 0
+        known[known] = self._create[prev[known]] == create[known]
+        changed = ~known
+        changed[known] = rows[known] != self._rows[prev[known]]
+        removed = self._pids.difference(pd.Index(rows['pid'])).to_numpy(dtype='<u4')
+        names = '\0'.join(processes['name'].astype(str).to_numpy()[~known]).encode('utf-8')
+
+        self.seq += 1
+        timestamp_ms = int(time.time() * 1000) if timestamp_ms is None else timestamp_ms
+        payload = b''.join([
+            FRAME_HEADER.pack(FRAME_MAGIC, self.seq, timestamp_ms),
+            _pack_array(moved.astype('u1')), _pack_array(values[moved]),
+            _pack_array(removed),
+            _pack_array(rows['pid'][~known]), _pack_array(create[~known]), FRAME_LENGTH.pack(len(names)) + names,
+            _pack_array(rows[changed]),
+        ])
+        self._metrics, self._pids, self._rows, self._create = values, pd.Index(rows['pid']), rows, create
+        frame = zlib.compress(payload, 1)
+        return FRAME_LENGTH.pack(len(frame)) + frame
+
+# Dashboard side: one per connected agent, rebuilds the host's metrics and process table
+class HostState:
+    def __init__(self, host):
+        self.host = host
+        self.seq = 0
+        self.timestamp_ms = 0
+        self.frames = 0
+        self.bytes = 0
+        self.connected = True
+        self.metrics = np.full(len(ALL_METRICS), np.nan)
+        self.processes = pd.DataFrame({'name': pd.Series(dtype=str), 'create_time': pd.Series(dtype=float),
+                                       **{f: pd.Series(dtype=FLEET_ROW[f]) for f in FLEET_FIELDS}},
+                                      index=pd.Index([], dtype='uint32', name='pid'))
+
+    def apply(self, frame):
+        buf = zlib.decompress(frame)
+        magic, self.seq, self.timestamp_ms = FRAME_HEADER.unpack_from(buf)
+        if magic != FRAME_MAGIC:
+            raise ValueError(f"Unknown frame format {magic!r}")
+        offset = FRAME_HEADER.size
+        moved, offset = _unpack_array(buf, offset, 'u1')
+        values, offset = _unpack_array(buf, offset, '<f8')
+        removed, offset = _unpack_array(buf, offset, '<u4')
+        new_pids, offset = _unpack_array(buf, offset, '<u4')
+        new_create, offset = _unpack_array(buf, offset, '<f8')
+        names, offset = _unpack_array(buf, offset, 'u1')
+        rows, offset = _unpack_array(buf, offset, FLEET_ROW)
+
+        self.metrics[moved] = values
+        processes = self.processes.drop(np.concatenate([removed, new_pids]), errors='ignore')
+        if len(new_pids):
+            added = pd.DataFrame({'name': names.tobytes().decode('utf-8').split('\0'), 'create_time': new_create},
+                                 index=pd.Index(new_pids, name='pid'))
+            processes = pd.concat([processes, added.reindex(columns=processes.columns)])
+        if len(rows):
+            processes.loc[rows['pid'], FLEET_FIELDS] = pd.DataFrame(rows[FLEET_FIELDS], index=rows['pid']).to_numpy()
+        self.processes = processes
+        self.frames += 1
+        self.bytes += FRAME_LENGTH.size + len(frame)
+
+    def frame(self):
+        df = self.processes.reset_index()
+        df.insert(0, 'host', self.host)
+        df['status'] = pd.Categorical.from_codes(np.where(df['status'] < len(PROCESS_STATUSES), df['status'], -1)
+                                                 .astype(int), categories=PROCESS_STATUSES)
+        df['create_time'] = pd.to_datetime(df['create_time'], unit='s')
+        df['io_bytes_per_s'] = df['read_bytes_per_s'] + df['write_bytes_per_s']
+        return df
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        buf += chunk
+    return bytes(buf)
+
+# TCP listener that owns one HostState per agent. An agent opens with a length-prefixed
+# host name, then sends snapshot frames until it disconnects.
+class FleetServer:
+    def __init__(self, host='127.0.0.1', port=FLEET_PORT):
+        self.hosts = {}
+        self._lock = threading.Lock()
+        fleet = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                fleet._serve(self.request)
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler, bind_and_activate=False)
+        self._server.daemon_threads = True
+        self._server.allow_reuse_address = True
+        self._server.server_bind()
+        self._server.server_activate()
+        self.address = self._server.server_address
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='fleet-server').start()
+
+    def _serve(self, sock):
+        (size,) = FRAME_LENGTH.unpack(_recv_exact(sock, FRAME_LENGTH.size))
+        state = HostState(_recv_exact(sock, size).decode('utf-8'))
+        with self._lock:
+            self.hosts[state.host] = state
+        try:
+            while True:
+                (size,) = FRAME_LENGTH.unpack(_recv_exact(sock, FRAME_LENGTH.size))
+                frame = _recv_exact(sock, size)
+                with self._lock:
+                    state.apply(frame)
+        except (ConnectionError, OSError, ValueError, zlib.error) as e:
+            logging.info(f"Agent {state.host} disconnected: {e}")
+        finally:
+            state.connected = False
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # One row per host: connection, freshness, bandwidth and its latest metrics
+    def hosts_frame(self):
+        now_ms = time.time() * 1000
+        with self._lock:
+            states = list(self.hosts.values())
+            rows = [{'Host': s.host, 'Connected': s.connected, 'Age (s)': (now_ms - s.timestamp_ms) / 1000,
+                     'Processes': len(s.processes), 'Frames': s.frames,
+                     'Bytes/frame': s.bytes / s.frames if s.frames else 0.0,
+                     **dict(zip(ALL_METRICS, s.metrics))} for s in states]
+        return pd.DataFrame(rows)
+
+    def processes_frame(self):
+        with self._lock:
+            frames = [s.frame() for s in self.hosts.values() if s.connected]
+        return pd.concat(frames, ignore_index=True) if frames else HostState('').frame()
+
+# Headless collector loop: samples the local host every interval and streams deltas to the
+# dashboard, reconnecting (with a fresh encoder, so the first frame is a full snapshot) on errors
+def run_agent(address, interval_s=1.0, name=None, stop=None):
+    backend = make_data_backend()
+    table = ProcessTable(backend=backend, min_interval_s=interval_s / 2)
+    collector = MetricsCollector(backend=backend, process_table=table)
+    name = (name or socket.gethostname()).encode('utf-8')
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            with socket.create_connection(address, timeout=10) as sock:
+                sock.sendall(FRAME_LENGTH.pack(len(name)) + name)
+                encoder = SnapshotEncoder()
+                while not stop.is_set():
+                    started = time.monotonic()
+                    processes = table.frame()
+                    sock.sendall(encoder.encode(collector.sample(ALL_METRICS), processes))
+                    stop.wait(max(0.0, interval_s - (time.monotonic() - started)))
+        except OSError as e:
+            logging.warning(f"Agent connection to {address[0]}:{address[1]} failed: {e}")
+            stop.wait(5)
@@ -0,0 +1,380 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+import numpy as np
+import pandas as pd
+import psutil
+from task_processes import ProcessTable
+from task_timings import StageTimings
+
+# System metrics for 2-sim-task-mgmr.py: collection from a data backend, the ring-buffer
+# history, the background sampler every dashboard session reads from, and downsampling of
+# history windows to the chart width.
+
+# psutil source each metric is derived from; every source is read at most once per tick
+METRIC_SOURCES = {
+    'CPU Usage (%)': 'cpu_times',
+    'Memory Usage (%)': 'virtual_memory',
+    'Disk Usage (%)': 'disk_usage',
+    'Network (Bytes Sent)': 'net_io',
+    'Network (Bytes Received)': 'net_io',
+    'Network (Bytes Sent+Received)': 'net_io',
+    'Processes Count': 'pids',
+    'Threads Count': 'threads',
+    'Battery (%)': 'battery',
+    'Swap Memory Usage (%)': 'swap',
+    'Disk Read Bytes': 'disk_io',
+    'Disk Write Bytes': 'disk_io',
+    'CPU Temperature': 'temperatures',
+    'Battery Time Left (Minutes)': 'battery',
+    'Network Errors': 'net_io',
+    'Network Drops': 'net_io',
+    'CPU Frequency (Current)': 'cpu_freq',
+    'CPU Frequency (Min)': 'cpu_freq',
+    'CPU Frequency (Max)': 'cpu_freq',
+    'Virtual Memory Total (MB)': 'virtual_memory',
+    'Virtual Memory Available (MB)': 'virtual_memory',
+    'Disk Total Space (GB)': 'disk_usage',
+    'Disk Free Space (GB)': 'disk_usage',
+}
+
+ALL_METRICS = list(METRIC_SOURCES)
+
+def _read_battery(collector):
+    if not hasattr(collector.backend, 'sensors_battery'):
+        return None
+    return collector.backend.sensors_battery()
+
+def _read_temperatures(collector):
+    if not hasattr(collector.backend, 'sensors_temperatures'):
+        return None
+    return collector.backend.sensors_temperatures()
+
+# Read from the shared process table instead of walking the processes again
+def _count_threads(collector):
+    return int(collector.process_table.frame()['num_threads'].sum())
+
+# Readers for each source, given the collector and through it the data backend
+SOURCE_READERS = {
+    'cpu_times': lambda c: c.backend.cpu_times(),
+    'virtual_memory': lambda c: c.backend.virtual_memory(),
+    'disk_usage': lambda c: c.backend.disk_usage('/'),
+    'net_io': lambda c: c.backend.net_io_counters(),
+    'pids': lambda c: c.backend.pids(),
+    'threads': _count_threads,
+    'battery': _read_battery,
+    'swap': lambda c: c.backend.swap_memory(),
+    'disk_io': lambda c: c.backend.disk_io_counters(),
+    'temperatures': _read_temperatures,
+    'cpu_freq': lambda c: c.backend.cpu_freq(),
+}
+
+def _cpu_temperature(snap):
+    entries = snap['temperatures'].get('coretemp')
+    return entries[0].current if entries else None
+
+METRIC_DERIVERS = {
+    'CPU Usage (%)': lambda s: s['cpu_percent'],
+    'Memory Usage (%)': lambda s: s['virtual_memory'].percent,
+    'Disk Usage (%)': lambda s: s['disk_usage'].percent,
+    'Network (Bytes Sent)': lambda s: s['net_io'].bytes_sent,
+    'Network (Bytes Received)': lambda s: s['net_io'].bytes_recv,
+    'Network (Bytes Sent+Received)': lambda s: s['net_io'].bytes_sent + s['net_io'].bytes_recv,
+    'Processes Count': lambda s: len(s['pids']),
+    'Threads Count': lambda s: s['threads'],
+    'Battery (%)': lambda s: s['battery'].percent,
+    'Swap Memory Usage (%)': lambda s: s['swap'].percent,
+    'Disk Read Bytes': lambda s: s['disk_io'].read_bytes,
+    'Disk Write Bytes': lambda s: s['disk_io'].write_bytes,
+    'CPU Temperature': _cpu_temperature,
+    'Battery Time Left (Minutes)': lambda s: s['battery'].secsleft // 60,
+    'Network Errors': lambda s: s['net_io'].errin + s['net_io'].errout,
+    'Network Drops': lambda s: s['net_io'].dropin + s['net_io'].dropout,
+    'CPU Frequency (Current)': lambda s: s['cpu_freq'].current,
+    'CPU Frequency (Min)': lambda s: s['cpu_freq'].min,
+    'CPU Frequency (Max)': lambda s: s['cpu_freq'].max,
+    'Virtual Memory Total (MB)': lambda s: s['virtual_memory'].total / (1024 * 1024),
+    'Virtual Memory Available (MB)': lambda s: s['virtual_memory'].available / (1024 * 1024),
+    'Disk Total Space (GB)': lambda s: s['disk_usage'].total / (1024 * 1024 * 1024),
+    'Disk Free Space (GB)': lambda s: s['disk_usage'].free / (1024 * 1024 * 1024),
+}
+
+# Collects a single snapshot of the psutil sources needed by the selected metrics.
+# CPU usage is computed from the cpu_times delta since the previous tick, so no call blocks.
+class MetricsCollector:
+    def __init__(self, backend=psutil, process_table=None, timings=None):
+        self.backend = backend
+        self.timings = timings or StageTimings()
+        self.process_table = process_table or ProcessTable(backend, timings=self.timings)
+        self._lock = threading.Lock()
+        self._prev_cpu = None
+
+    def snapshot(self, sources):
+        snap = {}
+        for source in sources:
+            try:
+                with self.timings.measure(f'collect.{source}'):
+                    snap[source] = SOURCE_READERS[source](self)
+            except (psutil.Error, OSError, RuntimeError) as e:
+                logging.warning(f"Failed to read {source}: {e}")
+                snap[source] = None
+        if snap.get('cpu_times') is not None:
+            snap['cpu_percent'] = self._cpu_percent(snap['cpu_times'])
+        return snap
+
+    def _cpu_percent(self, times):
+        total = sum(times)
+        # guest time is already accounted for in user/nice on Linux
+        total -= getattr(times, 'guest', 0) + getattr(times, 'guest_nice', 0)
+        busy = total - times.idle - getattr(times, 'iowait', 0)
+        with self._lock:
+            # Without a previous tick the delta is taken against boot, i.e. the average since boot
+            prev_busy, prev_total = self._prev_cpu or (0.0, 0.0)
+            self._prev_cpu = (busy, total)
+        delta = total - prev_total
+        if delta <= 0:
+            return 0.0
+        return round(min(100.0, max(0.0, (busy - prev_busy) / delta * 100)), 1)
+
+    def sample(self, selected_metrics):
+        metrics = {'Time': datetime.now().strftime('%H:%M:%S')}
+        selected_metrics = [m for m in selected_metrics if m in METRIC_SOURCES]
+        snap = self.snapshot({METRIC_SOURCES[m] for m in selected_metrics})
+        for metric in selected_metrics:
+            if snap[METRIC_SOURCES[metric]] is None:
+                continue
+            value = METRIC_DERIVERS[metric](snap)
+            if value is not None:
+                metrics[metric] = value
+        return metrics
+
+# History retention presets: label -> (retention seconds, resolution seconds). The shared
+# sampler keeps one history per resolution for the longest retention at that resolution.
+HISTORY_RETENTIONS = {
+    'Last 1h at 1s resolution': (3600, 1),
+    'Last 24h at 1s resolution': (24 * 3600, 1),
+    'Last 7d at 10s resolution': (7 * 24 * 3600, 10),
+}
+
+# Fixed-capacity ring buffer with one float column per metric and an int64 timestamp (ms).
+# Every row is written twice (slot and slot + capacity), so any window of up to capacity rows
+# is a contiguous slice and can be handed out as a view without copying.
+class MetricsHistory:
+    def __init__(self, metrics, retention_s, resolution_s=1):
+        self.metrics = list(metrics)
+        self.columns = {metric: i for i, metric in enumerate(self.metrics)}
+        self.retention_s = retention_s
+        self.resolution_s = resolution_s
+        self.capacity = max(1, int(retention_s // resolution_s))
+        self._resolution_ms = int(resolution_s * 1000)
+        self._values = np.full((2 * self.capacity, len(self.metrics)), np.nan)
+        self._times = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, metrics, timestamp_ms=None):
+        if timestamp_ms is None:
+            timestamp_ms = time.time_ns() // 1_000_000
+        row = np.full(len(self.metrics), np.nan)
+        for metric, value in metrics.items():
+            col = self.columns.get(metric)
+            if col is not None and value is not None:
+                row[col] = value
+        self._append_row(timestamp_ms, row)
+
+    def _append_row(self, timestamp_ms, row):
+        last = (self._next - 1) % self.capacity
+        # Samples falling in the same resolution slot are merged keeping each metric's maximum, so
+        # a coarse history still shows short spikes; the slot takes the latest sample's time
+        if self._size and timestamp_ms // self._resolution_ms == self._times[last] // self._resolution_ms:
+            slot = last
+            row = np.fmax(self._values[slot], row)
+        else:
+            slot = self._next
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+        self._values[slot] = self._values[slot + self.capacity] = row
+        self._times[slot] = self._times[slot + self.capacity] = timestamp_ms
+
+    # Zero-copy views of the last n rows, or of the rows recorded at or after since_ms
+    def window(self, n=None, since_ms=None):
+        n = self._size if n is None else min(n, self._size)
+        start = (self._next - n) % self.capacity
+        times = self._times[start:start + n]
+        values = self._values[start:start + n]
+        if since_ms is not None:
+            first = np.searchsorted(times, since_ms)
+            times, values = times[first:], values[first:]
+        return times, values
+
+    @property
+    def last_timestamp_ms(self):
+        return int(self._times[(self._next - 1) % self.capacity]) if self._size else None
+
+    def to_frame(self, n=None, since_ms=None):
+        times, values = self.window(n, since_ms)
+        df = pd.DataFrame(values, columns=self.metrics, copy=False)
+        df.insert(0, 'Time', pd.to_datetime(times, unit='ms'))
+        return df
+
+    # Copy of this history under a different retention, keeping the most recent rows
+    def with_retention(self, retention_s, resolution_s):
+        history = MetricsHistory(self.metrics, retention_s, resolution_s)
+        times, values = self.window()
+        for timestamp_ms, row in zip(times[-history.capacity:], values[-history.capacity:]):
+            history._append_row(timestamp_ms, row)
+        return history
+
+# Immutable result of one sampler tick; sessions must not modify metrics or processes
+class Snapshot(NamedTuple):
+    seq: int
+    timestamp_ms: int
+    metrics: Mapping
+    processes: pd.DataFrame
+
+# One background sampler per server process. It collects every metric and the process table
+# on a fixed interval, publishes each result as a new Snapshot and records it into the metric
+# histories, so any number of sessions read the latest snapshot and windows of one shared
+# history without triggering collection themselves, and history has no gaps while nobody is
+# watching. Listeners (such as the alert engine) are called with every new sample on the
+# sampler thread, after it has been recorded.
+class SharedSampler:
+    def __init__(self, collector, process_table, interval_s=1.0, listeners=(), retentions=HISTORY_RETENTIONS.values()):
+        self.collector = collector
+        self.process_table = process_table
+        self.interval_s = interval_s
+        self.listeners = list(listeners)
+        # One history per resolution, kept for the longest retention offered at that resolution
+        longest = {}
+        for retention_s, resolution_s in retentions:
+            longest[resolution_s] = max(retention_s, longest.get(resolution_s, 0))
+        self.histories = {resolution_s: MetricsHistory(ALL_METRICS, retention_s, resolution_s)
+                          for resolution_s, retention_s in longest.items()}
+        self._history_lock = threading.Lock()
+        self._snapshot = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-sampler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        seq = 0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                processes = self.process_table.frame()
+                metrics = self.collector.sample(ALL_METRICS)
+                seq += 1
+                self._snapshot = Snapshot(seq, time.time_ns() // 1_000_000, MappingProxyType(metrics), processes)
+                with self.collector.timings.measure('history.append'), self._history_lock:
+                    for history in self.histories.values():
+                        history.append(metrics, self._snapshot.timestamp_ms)
+                self._ready.set()
+                for listener in self.listeners:
+                    listener(self._snapshot.metrics, self._snapshot.timestamp_ms)
+            except Exception:
+                logging.exception("Metrics sampler tick failed")
+            self._stop.wait(max(0.0, self.interval_s - (time.monotonic() - started)))
+
+    # Latest published snapshot; only waits while the very first tick is being collected
+    def latest(self, timeout=10):
+        self._ready.wait(timeout)
+        return self._snapshot
+
+    # Metrics frame for one session's view (see visible_metrics): the history at the preset's
+    # resolution, limited to its retention. Read under the history lock, since the sampler
+    # thread keeps appending to the same ring buffers; the frame returned is a copy.
+    def visible_metrics(self, selected_metrics, retention_s, resolution_s, window_s=None, width_px=600, method='Min/Max'):
+        window_s = retention_s if window_s is None else min(window_s, retention_s)
+        with self._history_lock:
+            return visible_metrics(self.histories[resolution_s], selected_metrics, window_s, width_px, method)
+
+    def stop(self):
+        self._stop.set()
+
+# Downsampling methods for long metric histories
+DOWNSAMPLERS = ['Min/Max', 'LTTB']
+
+# Min/max bucketing over all metric columns at once. Each bucket keeps its minimum and its
+# maximum in time order, so a spike shorter than one pixel still shows up in the chart.
+def minmax_downsample(times, values, n_buckets):
+    n, m = values.shape
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    padded = np.full((n_buckets * size, m), np.nan)
+    padded[:n] = values
+    buckets = padded.reshape(n_buckets, size, m)
+    missing = np.isnan(buckets)
+    lo = np.argmin(np.where(missing, np.inf, buckets), axis=1)
+    hi = np.argmax(np.where(missing, -np.inf, buckets), axis=1)
+    rows = np.arange(n_buckets)[:, None]
+    cols = np.arange(m)[None, :]
+    out_values = np.empty((2 * n_buckets, m))
+    out_values[0::2] = buckets[rows, np.minimum(lo, hi), cols]
+    out_values[1::2] = buckets[rows, np.maximum(lo, hi), cols]
+    starts = np.arange(n_buckets) * size
+    out_times = np.empty(2 * n_buckets, dtype=times.dtype)
+    out_times[0::2] = times[starts]
+    out_times[1::2] = times[np.minimum(starts + size, n) - 1]
+    return out_times, out_values
+
+# Largest-Triangle-Three-Buckets over every metric column at once. Rows between the first and
+# last are cut into n_out - 2 buckets; bucket by bucket, each metric keeps the row forming the
+# largest triangle with its previously kept row and the average of its next bucket. The walk
+# over buckets is sequential, but each step is one array operation across all metrics and the
+# bucket averages are computed up front. NaN samples are never kept; points a metric did not
+# keep are left as NaN.
+def lttb_downsample(times, values, n_out):
+    n, m = values.shape
+    if n_out >= n or n_out < 3:
+        return times, values
+    x = (times - times[0]).astype(np.float64)
+    present = ~np.isnan(values)
+    cols = np.arange(m)
+    # Bucket i spans rows edges[i]:edges[i + 1]; the last one runs to the end
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.add.reduceat(present.view(np.int8), edges, axis=0, dtype=np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_y = np.add.reduceat(np.where(present, values, 0.0), edges, axis=0) / counts
+    avg_x = np.add.reduceat(x, edges) / np.diff(edges, append=n)
+
+    # NaN samples (and empty next buckets) give a NaN area, which is ranked below any real one
+    found = counts > 0
+    selected = np.empty((n_out, m), dtype=np.int64)
+    a = selected[0] = present.argmax(axis=0)
+    selected[-1] = n - 1 - present[::-1].argmax(axis=0)
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        xa, ya = x[a], values[a, cols]
+        # Twice the triangle area, |(xa - avg_x)(y - ya) - (xa - x)(avg_y - ya)|, expanded
+        slope_x, slope_y = xa - avg_x[i + 1], avg_y[i + 1] - ya
+        area = np.abs(values[lo:hi] * slope_x + x[lo:hi, None] * slope_y - (ya * slope_x + xa * slope_y))
+        best = lo + np.fmax(area, -1.0, out=area).argmax(axis=0)
+        a = selected[i + 1] = np.where(found[i], best, a)
+    keep = np.zeros(values.shape, dtype=bool)
+    keep[selected, cols] = True
+    keep &= present
+    rows = keep.any(axis=1)
+    return times[rows], np.where(keep, values, np.nan)[rows]
+
+# Metrics frame for the visible window, downsampled to about one point per pixel of chart width
+def visible_metrics(history, selected_metrics, window_s=None, width_px=600, method='Min/Max'):
+    since_ms = None
+    if window_s is not None and history.last_timestamp_ms is not None:
+        since_ms = history.last_timestamp_ms - window_s * 1000
+    times, values = history.window(since_ms=since_ms)
+    values = values[:, [history.columns[m] for m in selected_metrics]]
+    if len(times) > 2 * width_px:
+        if method == 'LTTB':
+            times, values = lttb_downsample(times, values, width_px)
+        else:
+            times, values = minmax_downsample(times, values, width_px)
+    df = pd.DataFrame(values, columns=selected_metrics, copy=False)
+    df.insert(0, 'Time', pd.to_datetime(times, unit='ms'))
+    return df
@@ -0,0 +1,155 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+import psutil
+from task_timings import StageTimings
+
+# Per-process data for the task managers. The attributes read for every process, the table
+# columns they expand into and the per-second rates between two snapshots are shared by
+# 2-sim-task-mgmr.py and 3-sim-task-mgmr.py; the incremental process table, the top-N view and
+# the process classifications are used by 2-sim-task-mgmr.py.
+
+# Attributes fetched for every process, in a single oneshot() per process per refresh
+PROCESS_ATTRS = ['pid', 'name', 'username', 'status', 'create_time', 'num_threads',
+                 'memory_percent', 'cpu_times', 'io_counters', 'num_ctx_switches']
+
+# Columns of the process table; cumulative counters are expanded into plain numeric columns
+PROCESS_COLUMNS = ['pid', 'name', 'username', 'status', 'create_time', 'num_threads', 'memory_percent',
+                   'cpu_time', 'read_count', 'write_count', 'read_bytes', 'write_bytes', 'ctx_switches']
+
+# Cumulative counters turned into per-second rates between refreshes
+RATE_COUNTERS = {
+    'cpu_time': 'cpu_percent',
+    'read_bytes': 'read_bytes_per_s',
+    'write_bytes': 'write_bytes_per_s',
+    'ctx_switches': 'ctx_switches_per_s',
+}
+RATE_COLUMNS = list(RATE_COUNTERS.values()) + ['io_bytes_per_s']
+
+# One PROCESS_COLUMNS row from a psutil as_dict()/process_iter() info dict
+def process_row(info):
+    cpu_times, io, ctx = info['cpu_times'], info['io_counters'], info['num_ctx_switches']
+    return (
+        info['pid'], info['name'], info['username'], info['status'], info['create_time'],
+        info['num_threads'], info['memory_percent'],
+        cpu_times.user + cpu_times.system if cpu_times else np.nan,
+        io.read_count if io else np.nan, io.write_count if io else np.nan,
+        io.read_bytes if io else np.nan, io.write_bytes if io else np.nan,
+        ctx.voluntary + ctx.involuntary if ctx else np.nan,
+    )
+
+# Per-second rates of the cumulative counters, computed as one array diff over the whole table.
+# Rows are matched to the previous snapshot on (pid, create_time) so a reused PID starts from zero.
+# Returns the rate columns and the counters to pass back in as prev_counters next time.
+def compute_process_rates(frame, prev_counters, elapsed_s):
+    key = pd.MultiIndex.from_arrays([frame['pid'], frame['create_time'].fillna(-1)])
+    counters = pd.DataFrame(frame[list(RATE_COUNTERS)].to_numpy(dtype=float), index=key, columns=list(RATE_COUNTERS))
+    if prev_counters is None or elapsed_s <= 0:
+        rates = np.zeros(counters.shape)
+    else:
+        delta = counters.to_numpy() - prev_counters.reindex(key).to_numpy()
+        rates = np.nan_to_num(np.where(delta >= 0, delta, 0.0) / elapsed_s)
+    rates[:, 0] *= 100  # CPU seconds per second -> percent
+    rates = pd.DataFrame(rates, index=frame.index, columns=list(RATE_COUNTERS.values()))
+    rates['io_bytes_per_s'] = rates['read_bytes_per_s'] + rates['write_bytes_per_s']
+    return rates, counters
+
+# Process table shared by every process view. psutil.Process handles are kept across
+# refreshes, so only PIDs that appeared are added and only PIDs that exited are evicted. A
+# handle keeps its process's start time, so one whose pid now belongs to another process
+# (is_running() is False) is replaced before it is read. Refreshes closer together than
+# min_interval_s reuse the previous frame.
+class ProcessTable:
+    def __init__(self, backend=psutil, min_interval_s=1.0, timings=None, clock=time.monotonic):
+        self.backend = backend
+        self.min_interval_s = min_interval_s
+        self.clock = clock
+        self.timings = timings or StageTimings()
+        self._lock = threading.Lock()
+        self._handles = {}
+        self._frame = pd.DataFrame(columns=PROCESS_COLUMNS + RATE_COLUMNS)
+        self._prev_counters = None
+        self._refreshed_at = None
+
+    def __len__(self):
+        return len(self._handles)
+
+    def refresh(self):
+        with self.timings.measure('collect.process_table'):
+            self._refresh()
+
+    def _refresh(self):
+        pids = set(self.backend.pids())
+        for pid in self._handles.keys() - pids:
+            del self._handles[pid]
+        for pid in pids - self._handles.keys():
+            try:
+                self._handles[pid] = self.backend.Process(pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        rows = []
+        for pid, handle in list(self._handles.items()):
+            try:
+                if not handle.is_running():
+                    handle = self._handles[pid] = self.backend.Process(pid)
+                # as_dict reads all attributes inside one oneshot() context
+                rows.append(process_row(handle.as_dict(PROCESS_ATTRS, ad_value=None)))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                del self._handles[pid]
+        now = self.clock()
+        frame = pd.DataFrame.from_records(rows, columns=PROCESS_COLUMNS)
+        elapsed_s = now - self._refreshed_at if self._refreshed_at is not None else 0
+        rates, self._prev_counters = compute_process_rates(frame, self._prev_counters, elapsed_s)
+        # Converted once per refresh so views and filters never touch rows one by one
+        frame['create_time'] = pd.to_datetime(frame['create_time'], unit='s')
+        frame['status'] = frame['status'].astype('category')
+        self._frame = pd.concat([frame, rates], axis=1)
+        self._refreshed_at = now
+
+    # Columnar snapshot of all processes; callers must treat it as read-only
+    def frame(self):
+        with self._lock:
+            if self._refreshed_at is None or self.clock() - self._refreshed_at >= self.min_interval_s:
+                self.refresh()
+            return self._frame
+
+# Columns shown in the top-N panels, renamed from the process table
+def process_info_view(table):
+    return pd.DataFrame({
+        'PID': table['pid'],
+        'Name': table['name'],
+        'CPU': table['cpu_percent'],
+        'Memory': table['memory_percent'],
+        'Read (B/s)': table['read_bytes_per_s'],
+        'Write (B/s)': table['write_bytes_per_s'],
+        'I/O (B/s)': table['io_bytes_per_s'],
+        'read_bytes': table['read_bytes'],
+        'write_bytes': table['write_bytes'],
+    })
+
+# Process columns ranked in the top-N panels
+TOP_N_METRICS = ['CPU', 'Memory', 'I/O (B/s)']
+
+# Default thresholds for the threshold classifications, tunable from the sidebar
+DEFAULT_FILTER_PARAMS = {'cpu_threshold': 10.0, 'memory_threshold': 10.0, 'top_k': 5}
+
+def mask_filter(mask):
+    return lambda df, params: df[mask(df, params)]
+
+def top_k_filter(column):
+    return lambda df, params: df.nlargest(params['top_k'], column)
+
+# Process classifications: each one is a vectorized boolean mask or a top-k selection over the
+# shared process snapshot, so switching between them never rescans the processes
+PROCESS_CLASSIFICATIONS = {
+    'All': lambda df, params: df,
+    'High CPU Usage': mask_filter(lambda df, params: df['cpu_percent'] > params['cpu_threshold']),
+    'High Memory Usage': mask_filter(lambda df, params: df['memory_percent'] > params['memory_threshold']),
+    'Running': mask_filter(lambda df, params: df['status'] == 'running'),
+    'Stopped': mask_filter(lambda df, params: df['status'] == 'stopped'),
+    'Top CPU': top_k_filter('cpu_percent'),
+    'Top Memory': top_k_filter('memory_percent'),
+    'Top I/O': top_k_filter('io_bytes_per_s'),
+}
@@ -0,0 +1,55 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# Rolling per-stage timings of the collector and renderer. Each stage keeps its last `window`
+# durations in memory; percentiles are only computed when the diagnostics page asks for them.
+# With export on, every measurement is also written to the log as a JSON line, and refresh
+# stages slower than budget_ms are logged as warnings.
+class StageTimings:
+    def __init__(self, window=1024):
+        self.window = window
+        self.export = False
+        self.budget_ms = None
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def record(self, stage, ms):
+        samples = self._samples.get(stage)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(stage, deque(maxlen=self.window))
+        samples.append(ms)
+        if self.export:
+            logging.info(json.dumps({'event': 'stage_timing', 'stage': stage, 'ms': round(ms, 3)}))
+        if self.budget_ms is not None and stage.startswith('refresh.') and ms > self.budget_ms:
+            logging.warning(json.dumps({'event': 'refresh_over_budget', 'stage': stage,
+                                        'ms': round(ms, 3), 'budget_ms': self.budget_ms}))
+
+    def summary(self):
+        with self._lock:
+            items = sorted(self._samples.items())
+        rows = []
+        for stage, samples in items:
+            values = np.fromiter(list(samples), dtype=float)
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            rows.append({'Stage': stage, 'Count': len(values), 'Last (ms)': values[-1],
+                         'p50 (ms)': p50, 'p95 (ms)': p95, 'p99 (ms)': p99})
+        return pd.DataFrame(rows, columns=['Stage', 'Count', 'Last (ms)', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)'])
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
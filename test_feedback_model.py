@@ -0,0 +1,52 @@
+import os
+import pandas as pd
+import pytest
+from feedback_data import DATA_FILE
+from feedback_model import DEFAULT_CONFIG, fold_in, load_or_train, model_configs
+
+# Checks for folding labelled rows into the incremental model. Run with: python -m pytest -q
+
+@pytest.fixture
+def sgd_artifact(tmp_path):
+    path = os.path.join(tmp_path, 'data.csv')
+    pd.read_csv(DATA_FILE, nrows=1000).to_csv(path, index=False)
+    config = next(c for c in model_configs(path).values() if c['engine'] == 'sgd_hashing')
+    return path, load_or_train(path, config)
+
+def test_fold_in_swaps_model_and_rescores(sgd_artifact):
+    path, artifact = sgd_artifact
+    model, version = artifact['model'], artifact['version']
+    labelled = pd.read_csv(path, nrows=200)
+    # Re-scoring uses the held-out sample stored in the artifact, not the data file
+    os.remove(path)
+    rows = fold_in(artifact, labelled, path)
+    assert rows == 200
+    assert artifact['model'] is not model
+    assert artifact['version'] != version
+    assert artifact['folded_rows'] == 200
+    assert 0.0 <= artifact['metrics']['accuracy'] <= 1.0
+    assert artifact['metrics']['accuracy_rows'] == 200
+
+def test_fold_in_rejects_unknown_labels_and_keeps_model(sgd_artifact):
+    path, artifact = sgd_artifact
+    model, version = artifact['model'], artifact['version']
+    labelled = pd.read_csv(path, nrows=5).assign(Sentiment='Furious')
+    with pytest.raises(ValueError, match='Unknown label'):
+        fold_in(artifact, labelled, path)
+    with pytest.raises(ValueError, match='missing column'):
+        fold_in(artifact, labelled[['Complaint']], path)
+    assert artifact['model'] is model and artifact['version'] == version
+
+def test_dedup_config_trains_on_one_ticket_per_cluster(tmp_path):
+    path = os.path.join(tmp_path, 'data.csv')
+    df = pd.read_csv(DATA_FILE, nrows=500)
+    pd.concat([df, df.iloc[:100]]).to_csv(path, index=False)
+    config = {**DEFAULT_CONFIG, 'classifier': {'n_estimators': 5, 'random_state': 42}}
+    artifact = load_or_train(path, config)
+    deduped = load_or_train(path, {**config, 'dedup_threshold': 0.8})
+    assert deduped['version'] != artifact['version']
+    # Every copy of the 100 repeated tickets is one cluster: at most one stays in training, and
+    # none when a copy is held out
+    assert artifact['metrics']['train_rows'] == 480
+    assert deduped['metrics']['train_rows'] <= 400
+    assert deduped['metrics']['accuracy_rows'] == 120
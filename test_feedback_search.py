@@ -0,0 +1,61 @@
+import math
+import os
+import pandas as pd
+from feedback_data import TEXT_COLUMNS
+from feedback_search import BM25_B, BM25_K1, FILTER_COLUMNS, SearchIndex, build_index, tokenize
+
+# Correctness checks for the ticket search in Customer-Feedback-App.py. Run with: python -m pytest -q
+
+TICKETS = [
+    ('printer is broken again', 'very slow response', 'Hardware', 'Open', 'Negative'),
+    ('password reset', 'quick and friendly', 'Software', 'Closed', 'Positive'),
+    ('printer toner empty', 'printer fixed quickly', 'Hardware', 'Closed', 'Positive'),
+    ('network outage in office', 'slow', 'Network', 'Open', 'Negative'),
+]
+
+def tickets():
+    df = pd.DataFrame({column: [''] * len(TICKETS) for column in TEXT_COLUMNS})
+    df['Issue Description'] = [t[0] for t in TICKETS]
+    df['Customer Feedback'] = [t[1] for t in TICKETS]
+    for i, column in enumerate(FILTER_COLUMNS):
+        df[column] = [t[2 + i] for t in TICKETS]
+    return df
+
+def search_index(tmp_path):
+    directory = os.path.join(tmp_path, 'index')
+    build_index(tickets(), directory)
+    return SearchIndex(directory)
+
+# BM25 computed directly from the documents' tokens
+def brute_force_scores(query):
+    documents = [tokenize(' '.join([t[0], t[1]] + [''] * (len(TEXT_COLUMNS) - 2))) for t in TICKETS]
+    avg_len = sum(len(d) for d in documents) / len(documents)
+    scores = [0.0] * len(documents)
+    for term in set(tokenize(query)):
+        matching = sum(term in d for d in documents)
+        if not matching:
+            continue
+        idf = math.log(1 + (len(documents) - matching + 0.5) / (matching + 0.5))
+        for i, d in enumerate(documents):
+            tf = d.count(term)
+            if tf:
+                scores[i] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * len(d) / avg_len))
+    return scores
+
+def test_bm25_scores_match_formula(tmp_path):
+    index = search_index(tmp_path)
+    for query in ['printer', 'slow printer', 'Printer SLOW office', 'password']:
+        expected = brute_force_scores(query)
+        total, rows, scores = index.search(query)
+        assert total == sum(s > 0 for s in expected)
+        assert sorted(rows.tolist(), key=lambda r: -expected[r]) == rows.tolist()
+        for row, score in zip(rows, scores):
+            assert math.isclose(score, expected[row], rel_tol=1e-9)
+
+def test_search_filters_paging_and_unknown_terms(tmp_path):
+    index = search_index(tmp_path)
+    assert index.search('printer', filters={'Status': ['Closed']})[1].tolist() == [2]
+    assert index.search('printer', filters={'Status': ['Missing']})[0] == 0
+    total, rows, _ = index.search('slow printer', page=1, page_size=1)
+    assert total == 3 and len(rows) == 1
+    assert index.search('zebra')[0] == 0
@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+from task_alerts import AlertEngine
+from task_backend import FakeBackend
+from task_fleet import HostState, SnapshotEncoder
+from task_metrics import ALL_METRICS, MetricsHistory, lttb_downsample, minmax_downsample
+from task_processes import PROCESS_COLUMNS, ProcessTable, compute_process_rates
+
+# Correctness checks for the code timed by bench-task-mgmr.py. Run with: python -m pytest -q
+
+CPU = 'CPU Usage (%)'
+
+# -- Metrics history ring buffer --
+
+def test_history_wraps_and_keeps_latest_rows_in_order():
+    history = MetricsHistory(['a'], retention_s=5)
+    for i in range(12):
+        history.append({'a': float(i)}, timestamp_ms=i * 1000)
+    times, values = history.window()
+    assert len(history) == 5
+    assert times.tolist() == [7000, 8000, 9000, 10000, 11000]
+    assert values[:, 0].tolist() == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert history.last_timestamp_ms == 11000
+    assert history.window(2)[1][:, 0].tolist() == [10.0, 11.0]
+    assert history.window(since_ms=9500)[0].tolist() == [10000, 11000]
+
+def test_history_samples_in_same_slot_keep_maximum():
+    history = MetricsHistory(['a', 'b'], retention_s=60, resolution_s=10)
+    history.append({'a': 1.0, 'b': 4.0}, timestamp_ms=10_000)
+    history.append({'a': 9.0}, timestamp_ms=12_000)
+    history.append({'a': 2.0, 'b': 3.0}, timestamp_ms=15_000)
+    history.append({'a': 3.0}, timestamp_ms=20_000)
+    times, values = history.window()
+    assert times.tolist() == [15_000, 20_000]
+    # The spike to 9 survives a later lower sample, and a missing value does not erase 'b'
+    assert values[:, 0].tolist() == [9.0, 3.0]
+    assert values[0, 1] == 4.0 and np.isnan(values[1, 1])
+
+def test_history_with_retention_keeps_most_recent_rows():
+    history = MetricsHistory(['a'], retention_s=10)
+    for i in range(10):
+        history.append({'a': float(i)}, timestamp_ms=i * 1000)
+    shorter = history.with_retention(3, 1)
+    assert shorter.window()[1][:, 0].tolist() == [7.0, 8.0, 9.0]
+
+# -- Downsampling --
+
+def test_minmax_keeps_endpoints_and_short_spikes():
+    times = np.arange(1000, dtype=np.int64)
+    values = np.zeros((1000, 2))
+    values[123, 0] = 50.0
+    values[456, 1] = -50.0
+    out_times, out_values = minmax_downsample(times, values, 50)
+    assert len(out_times) == 100
+    assert out_times[0] == 0 and out_times[-1] == 999
+    assert out_values[:, 0].max() == 50.0
+    assert out_values[:, 1].min() == -50.0
+
+def test_lttb_keeps_endpoints_and_spikes_and_skips_nan():
+    times = np.arange(1000, dtype=np.int64)
+    values = np.sin(np.linspace(0, 10, 1000))[:, None].repeat(2, axis=1)
+    values[500, 0] = 100.0
+    values[:10, 1] = np.nan
+    out_times, out_values = lttb_downsample(times, values, 100)
+    assert out_times[0] == 0 and out_times[-1] == 999
+    assert np.all(np.diff(out_times) > 0)
+    assert 100.0 in out_values[:, 0]
+    # At most one point per bucket per metric, and never a NaN sample
+    kept = (~np.isnan(out_values)).sum(axis=0)
+    assert kept[0] == 100 and 90 <= kept[1] <= 100
+    assert out_times[~np.isnan(out_values[:, 1])].min() == 10
+
+# -- Process rates --
+
+def process_frame(rows):
+    frame = pd.DataFrame(rows, columns=['pid', 'create_time', 'cpu_time', 'read_bytes', 'write_bytes', 'ctx_switches'])
+    return frame.reindex(columns=PROCESS_COLUMNS)
+
+def test_process_rates_between_snapshots_and_reused_pid_starts_from_zero():
+    first = process_frame([(1, 100.0, 10.0, 1000, 0, 5), (2, 100.0, 3.0, 0, 0, 0)])
+    rates, counters = compute_process_rates(first, None, 0)
+    assert (rates.to_numpy() == 0).all()
+    # pid 2 exited and was reused by a process with another start time
+    second = process_frame([(1, 100.0, 10.5, 3000, 1000, 15), (2, 200.0, 1.0, 500, 0, 0)])
+    rates, _ = compute_process_rates(second, counters, 2.0)
+    assert rates.loc[0, 'cpu_percent'] == 25.0
+    assert rates.loc[0, 'read_bytes_per_s'] == 1000.0
+    assert rates.loc[0, 'io_bytes_per_s'] == 1500.0
+    assert rates.loc[0, 'ctx_switches_per_s'] == 5.0
+    assert (rates.loc[1] == 0).all()
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_process_table_replaces_handles_of_reused_pids():
+    clock = ManualClock()
+    # 40 pids for 30 processes and a third of them replaced per second, so pids are soon reused
+    backend = FakeBackend(n_processes=30, churn_per_s=0.3, seed=1, clock=clock, max_pid=40)
+    table = ProcessTable(backend=backend, min_interval_s=0, clock=clock)
+    first_seen, reused = {}, 0
+    for _ in range(20):
+        clock.now += 1.0
+        frame = table.frame()
+        actual = {pid: backend._process_info(pid)['create_time'] for pid in frame['pid']}
+        for row in frame.itertuples():
+            started = pd.Timestamp(actual[row.pid], unit='s')
+            assert row.create_time == started
+            if first_seen.setdefault(row.pid, started) != started:
+                reused += 1
+                first_seen[row.pid] = started
+                # A new process in a reused pid starts from zero rather than diffing the old one
+                assert row.cpu_percent == 0 and row.io_bytes_per_s == 0
+    assert reused > 0
+
+# -- Fleet delta frames --
+
+def fleet_processes(rows):
+    return pd.DataFrame({
+        'pid': [r[0] for r in rows], 'name': [r[1] for r in rows],
+        'create_time': pd.to_datetime([r[2] for r in rows], unit='s'),
+        'status': pd.Categorical([r[3] for r in rows]), 'num_threads': [r[4] for r in rows],
+        'memory_percent': [r[5] for r in rows], 'cpu_percent': [r[6] for r in rows],
+        'read_bytes_per_s': [0.0] * len(rows), 'write_bytes_per_s': [0.0] * len(rows),
+    })
+
+def assert_host_matches(state, metrics, processes):
+    frame = state.frame().set_index('pid').sort_index()
+    expected = processes.set_index('pid').sort_index()
+    assert frame.index.tolist() == expected.index.tolist()
+    assert frame['name'].tolist() == expected['name'].tolist()
+    assert frame['create_time'].tolist() == expected['create_time'].tolist()
+    assert frame['status'].astype(str).tolist() == expected['status'].astype(str).tolist()
+    assert frame['num_threads'].tolist() == expected['num_threads'].tolist()
+    np.testing.assert_allclose(frame['cpu_percent'], expected['cpu_percent'], atol=0.05)
+    np.testing.assert_allclose(frame['memory_percent'], expected['memory_percent'], atol=0.005)
+    for metric, value in metrics.items():
+        assert state.metrics[ALL_METRICS.index(metric)] == value
+
+def test_delta_frames_rebuild_host_state():
+    encoder, state = SnapshotEncoder(), HostState('node')
+    steps = [
+        ({CPU: 10.0}, [(1, 'init', 100, 'sleeping', 1, 0.1, 0.0), (2, 'sshd', 100, 'running', 3, 1.5, 12.3)]),
+        # unchanged: only the header goes over the wire
+        ({CPU: 10.0}, [(1, 'init', 100, 'sleeping', 1, 0.1, 0.0), (2, 'sshd', 100, 'running', 3, 1.5, 12.3)]),
+        # pid 2 changed, pid 3 started
+        ({CPU: 20.0}, [(1, 'init', 100, 'sleeping', 1, 0.1, 0.0), (2, 'sshd', 100, 'sleeping', 4, 1.5, 0.5),
+                       (3, 'bash', 150, 'running', 1, 0.2, 1.0)]),
+        # pid 1 exited, pid 3 was reused by another process
+        ({CPU: 5.0}, [(2, 'sshd', 100, 'sleeping', 4, 1.5, 0.5), (3, 'vim', 200, 'running', 2, 0.3, 2.0)]),
+    ]
+    sizes = []
+    for metrics, rows in steps:
+        processes = fleet_processes(rows)
+        frame = encoder.encode(metrics, processes, timestamp_ms=1000)
+        state.apply(frame[4:])
+        sizes.append(len(frame))
+        assert_host_matches(state, metrics, processes)
+    assert sizes[1] < sizes[0]
+    assert state.seq == len(steps)
+
+# -- Alert state machine --
+
+def alert_engine(rules, cooldown_s=60.0):
+    return AlertEngine(rules=rules, log_path=None, cooldown_s=cooldown_s)
+
+def feed(engine, values, start_s=0):
+    for i, value in enumerate(values):
+        engine.observe({CPU: value}, (start_s + i) * 1000)
+    return [event['event'] for event in engine.events]
+
+def test_alert_fires_only_after_sustained_breach():
+    engine = alert_engine([f'{CPU} > 90 for 3s'])
+    assert feed(engine, [95, 95, 95, 50, 95, 95, 95]) == []
+    assert len(engine.active()) == 0
+    engine.observe({CPU: 95}, 7000)
+    assert [e['event'] for e in engine.events] == ['fired']
+    assert engine.active()['Rule'].tolist() == [f'{CPU} > 90 for 3s']
+
+def test_alert_clears_only_past_hysteresis_level():
+    engine = alert_engine([f'{CPU} > 90 clear 80'])
+    assert feed(engine, [95, 85, 91, 85]) == ['fired']
+    assert len(engine.active()) == 1
+    assert feed(engine, [79], start_s=4) == ['fired', 'resolved']
+    assert len(engine.active()) == 0
+
+def test_rate_alert_fires_on_rising_trend():
+    engine = alert_engine([f'{CPU} rising 10%/min over 10s'])
+    assert feed(engine, [50.0] * 10) == []
+    assert feed(engine, [50.0 + i for i in range(10)], start_s=10) == ['fired']
+
+def test_alert_within_cooldown_is_suppressed_until_cooldown_passes():
+    engine = alert_engine([f'{CPU} > 90 clear 80'], cooldown_s=10)
+    assert feed(engine, [95, 50]) == ['fired', 'resolved']
+    # A new episode 2 s later is inside the cooldown: not active, not logged, no resolve
+    assert feed(engine, [95, 95], start_s=2) == ['fired', 'resolved']
+    assert len(engine.active()) == 0
+    assert feed(engine, [50, 95, 50], start_s=4) == ['fired', 'resolved']
+    # Still breached once the cooldown has passed, so it fires then
+    assert feed(engine, [95] * 4, start_s=7) == ['fired', 'resolved', 'fired']
+    assert engine.events[-1]['time'].endswith(':10')
+    assert len(engine.active()) == 1
+
+def test_editing_rules_keeps_state_of_unchanged_rules():
+    firing, sustained = f'{CPU} > 90 clear 80', f'{CPU} > 90 for 5s'
+    engine = alert_engine([firing, sustained])
+    assert feed(engine, [95, 95, 95]) == ['fired']
+    # The firing rule stays active and the sustained rule keeps its breach start
+    engine.set_rules([sustained, firing, f'{CPU} < 10'])
+    assert engine.active()['Rule'].tolist() == [firing]
+    assert feed(engine, [95, 95, 95], start_s=3) == ['fired', 'fired']
+    assert engine.events[-1]['rule'] == sustained and engine.events[-1]['time'].endswith(':05')
+    # Removing a firing rule resolves it
+    engine.set_rules([sustained])
+    assert [(e['event'], e['rule']) for e in engine.events][-1] == ('resolved', firing)
+    assert engine.active()['Rule'].tolist() == [sustained]